@@ -0,0 +1,110 @@
+"""
+bench_dedup.py
+Overlap resolution on synthetic candidate spans: original last-kept
+comparison vs weighted interval scheduling.
+
+Usage:
+    python benchmarks/bench_dedup.py [--spans 20000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from NER.labeler.weak_labeler import WeakLabeler, Entity, LABEL_PRIORITY  # noqa: E402
+
+
+# ===============================
+# SYNTHETIC CANDIDATES
+# ===============================
+
+def make_candidates(n_spans, seed=0):
+    """Long text with dense DATE/DATE_EN catch-all hits under the real fields"""
+    rng = random.Random(seed)
+    labels = list(LABEL_PRIORITY) + ['WARD_EN', 'MUNICIPALITY_EN']
+    weights = [1] * len(labels)
+    weights[labels.index('DATE')] = 8
+    weights[labels.index('DATE_EN')] = 8
+
+    entities = []
+    text_len = n_spans * 4
+    for _ in range(n_spans):
+        label = rng.choices(labels, weights)[0]
+        length = rng.randint(1, 2) if label.startswith('DATE') else rng.randint(4, 30)
+        start = rng.randrange(text_len)
+        entities.append(Entity("x" * length, label, start, start + length))
+    return entities
+
+
+# ===============================
+# REFERENCE (ORIGINAL) RESOLVER
+# ===============================
+
+def deduplicate_reference(entities):
+    entities = sorted(entities, key=lambda x: x.start)
+    filtered = []
+    for entity in entities:
+        if not filtered:
+            filtered.append(entity)
+            continue
+        last = filtered[-1]
+        if entity.start >= last.end:
+            filtered.append(entity)
+            continue
+        priority = dict(LABEL_PRIORITY)
+        entity_priority = priority.get(entity.label, 0)
+        last_priority = priority.get(last.label, 0)
+        if entity_priority > last_priority:
+            filtered[-1] = entity
+        elif entity_priority == last_priority and len(entity.text) < len(last.text):
+            filtered[-1] = entity
+    return filtered
+
+
+def score(entities):
+    """Kept spans per priority level, highest level first"""
+    levels = sorted(set(LABEL_PRIORITY.values()) | {0}, reverse=True)
+    return tuple(sum(1 for e in entities if LABEL_PRIORITY.get(e.label, 0) == p) for p in levels)
+
+
+def overlaps(entities):
+    ordered = sorted(entities, key=lambda e: e.start)
+    return sum(1 for a, b in zip(ordered, ordered[1:]) if b.start < a.end)
+
+
+def timed(fn, arg, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(list(arg))
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spans", type=int, default=20000)
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.spans)
+    labeler = WeakLabeler()
+
+    before, before_t = timed(deduplicate_reference, candidates)
+    after, after_t = timed(labeler._deduplicate_entities, candidates)
+
+    print(f"candidates:    {len(candidates)}")
+    print(f"before:        {before_t * 1000:.1f} ms  kept={len(before)}  overlaps={overlaps(before)}")
+    print(f"after:         {after_t * 1000:.1f} ms  kept={len(after)}  overlaps={overlaps(after)}")
+    print(f"kept per priority (high→low)")
+    print(f"  before:      {score(before)}")
+    print(f"  after:       {score(after)}")
+
+    if overlaps(after) or score(after) < score(before):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+bench_detector.py
+Layout detector backends: latency, peak memory and parity with torch.
+
+Usage:
+    python src/detection.py export --quantize       # writes best.onnx and best.int8.onnx
+    python benchmarks/bench_detector.py [--images citizenship/images] [--limit 50]
+        [--onnx runs/detect/train/weights/best.onnx]
+        [--int8 runs/detect/train/weights/best.int8.onnx]
+
+Each backend runs in its own process, so peak RSS covers only that
+backend's imports and model. Parity: detections of each ONNX backend are
+matched to the torch ones (same class, IoU >= --iou); the script exits
+non-zero when recall or precision falls below --min-match, or the mean
+IoU of matched boxes below --min-iou. The ONNX letterbox pads to a square
+(ultralytics auto=False) while torch pads to the stride, so boxes are
+close but not identical.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+
+def list_paths(folder, limit):
+    exts = (".jpg", ".jpeg", ".png")
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(exts))
+    return [os.path.join(folder, n) for n in names[:limit]]
+
+
+# ===============================
+# CHILD: ONE BACKEND
+# ===============================
+
+def run_backend(backend, weights, paths, batch):
+    import cv2
+    from detection import load_detector
+
+    images = [cv2.imread(p) for p in paths]
+    images = [img for img in images if img is not None]
+
+    start = time.perf_counter()
+    detector = load_detector(backend, weights)
+    load_s = time.perf_counter() - start
+
+    detector.detect(images[0])  # warm-up
+
+    start = time.perf_counter()
+    detections = []
+    for i in range(0, len(images), batch):
+        detections.extend(detector.detect_batch(images[i:i + batch]))
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "load_s": load_s,
+        "ms_per_image": elapsed * 1000 / len(images),
+        "peak_rss_mb": peak_mb,
+        "detections": detections,
+    }
+
+
+# ===============================
+# PARITY
+# ===============================
+
+def iou(a, b):
+    iw = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    ih = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = iw * ih
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def parity(reference, candidate, threshold):
+    """Greedy same-class IoU matching over all images"""
+    matched = total_ref = total_cand = 0
+    ious, conf_diffs = [], []
+    for ref_dets, cand_dets in zip(reference, candidate):
+        total_ref += len(ref_dets)
+        total_cand += len(cand_dets)
+        used = set()
+        for r in ref_dets:
+            best, best_j = threshold, None
+            for j, c in enumerate(cand_dets):
+                if j in used or c["class"] != r["class"]:
+                    continue
+                score = iou(r["bbox"], c["bbox"])
+                if score >= best:
+                    best, best_j = score, j
+            if best_j is not None:
+                used.add(best_j)
+                matched += 1
+                ious.append(best)
+                conf_diffs.append(abs(r["confidence"] - cand_dets[best_j]["confidence"]))
+    return {
+        "recall": matched / total_ref if total_ref else 1.0,
+        "precision": matched / total_cand if total_cand else 1.0,
+        "mean_iou": sum(ious) / len(ious) if ious else 0.0,
+        "max_conf_diff": max(conf_diffs) if conf_diffs else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", default="citizenship/images")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--weights", default=None, help="torch .pt weights")
+    parser.add_argument("--onnx", default="runs/detect/train/weights/best.onnx")
+    parser.add_argument("--int8", default="runs/detect/train/weights/best.int8.onnx")
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--min-match", type=float, default=0.95)
+    parser.add_argument("--min-iou", type=float, default=0.9,
+                        help="minimum mean IoU of matched boxes")
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "WEIGHTS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    paths = list_paths(args.images, args.limit)
+
+    if args.child:
+        backend, weights = args.child
+        result = run_backend(backend, None if weights == "-" else weights, paths, args.batch)
+        json.dump(result, sys.stdout)
+        return
+
+    runs = [("torch", "torch", args.weights or "-")]
+    for name, path in (("onnx", args.onnx), ("onnx-int8", args.int8)):
+        if path and os.path.exists(path):
+            runs.append((name, "onnx", path))
+        else:
+            print(f"skipping {name}: {path} not found (python src/detection.py export --quantize)")
+
+    results = {}
+    for name, backend, weights in runs:
+        out = subprocess.run(
+            [sys.executable, __file__, "--images", args.images, "--limit", str(args.limit),
+             "--batch", str(args.batch), "--child", backend, weights],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[name] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"\n{len(paths)} images, batch {args.batch}")
+    print(f"{'backend':>10}  {'load s':>7}  {'ms/image':>9}  {'peak MB':>8}  "
+          f"{'recall':>7}  {'precision':>9}  {'mean IoU':>8}  {'max dconf':>9}")
+
+    failures = []
+    reference = results["torch"]["detections"]
+    for name, r in results.items():
+        p = parity(reference, r["detections"], args.iou)
+        if name != "torch":
+            if min(p["recall"], p["precision"]) < args.min_match:
+                failures.append(f"{name}: recall/precision below {args.min_match}")
+            if p["mean_iou"] < args.min_iou:
+                failures.append(f"{name}: mean IoU {p['mean_iou']:.3f} below {args.min_iou}")
+        print(f"{name:>10}  {r['load_s']:>7.2f}  {r['ms_per_image']:>9.1f}  {r['peak_rss_mb']:>8.0f}  "
+              f"{p['recall']:>7.3f}  {p['precision']:>9.3f}  {p['mean_iou']:>8.3f}  {p['max_conf_diff']:>9.3f}")
+
+    if failures:
+        print("\nParity check FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
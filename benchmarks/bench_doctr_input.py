@@ -0,0 +1,104 @@
+"""
+bench_doctr_input.py
+Per-crop latency of feeding DocTR: temp-file JPEG round trip vs in-memory page.
+Also checks that the in-memory path creates no files in the temp directory.
+
+Usage:
+    python benchmarks/bench_doctr_input.py [--crops 200] [--real]
+
+Without --real a stub predictor is used, so only the input path is timed.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from OCR.Main_ocr import preprocess  # noqa: E402
+from NER.ocr_ner_pipeline import _to_doctr_page  # noqa: E402
+
+
+class StubPredictor:
+    """Touches every pixel like a real predictor's first layer would"""
+
+    def __call__(self, pages):
+        return [float(p.mean()) for p in pages]
+
+
+def make_crops(n, seed=0):
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(n):
+        h, w = int(rng.integers(60, 200)), int(rng.integers(300, 1200))
+        crop = np.full((h, w, 3), 235, np.uint8)
+        for y in range(15, h - 15, 30):
+            cv2.putText(crop, "Citizenship Certificate No. 28-01-72-00911",
+                        (10, y + 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (20, 20, 20), 1)
+        crops.append(preprocess(crop))
+    return crops
+
+
+def tempfile_path(model, processed):
+    """The previous _ocr_english input path"""
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
+        cv2.imwrite(tmp.name, processed)
+        try:
+            from doctr.io import DocumentFile
+            doc = DocumentFile.from_images(tmp.name)
+        except ImportError:
+            doc = [cv2.cvtColor(cv2.imread(tmp.name), cv2.COLOR_BGR2RGB)]
+    os.unlink(tmp.name)  # keep the benchmark from filling /tmp
+    return model(doc)
+
+
+def memory_path(model, processed):
+    return model([_to_doctr_page(processed)])
+
+
+def temp_files():
+    return set(os.listdir(tempfile.gettempdir()))
+
+
+def bench(fn, model, crops):
+    start = time.perf_counter()
+    for crop in crops:
+        fn(model, crop)
+    return (time.perf_counter() - start) / len(crops) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", type=int, default=200)
+    parser.add_argument("--real", action="store_true", help="use the pretrained DocTR predictor")
+    args = parser.parse_args()
+
+    if args.real:
+        from doctr.models import ocr_predictor
+        model = ocr_predictor(pretrained=True)
+    else:
+        model = StubPredictor()
+
+    crops = make_crops(args.crops)
+
+    before = bench(tempfile_path, model, crops)
+
+    files_before = temp_files()
+    after = bench(memory_path, model, crops)
+    created = temp_files() - files_before
+
+    print(f"crops:           {len(crops)}  ({'doctr' if args.real else 'stub predictor'})")
+    print(f"temp-file JPEG:  {before:.2f} ms/crop")
+    print(f"in-memory:       {after:.2f} ms/crop")
+    print(f"files created:   {len(created)}")
+
+    if created:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
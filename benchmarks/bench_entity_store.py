@@ -0,0 +1,122 @@
+"""
+bench_entity_store.py
+Entity store (src/NER/entity_store.py) at archive scale: bulk insert rate,
+then exact / prefix / word-prefix lookup latency, against a linear scan of
+the same entities as the JSON-dump baseline. Finishes by re-indexing
+repeated document ids and running the FTS5 integrity check.
+
+Usage:
+    python benchmarks/bench_entity_store.py [--documents 200000] [--db /tmp/entities.sqlite]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from NER.entity_store import EntityStore, normalize_value  # noqa: E402
+
+GIVEN = ["राम", "सीता", "हरि", "गीता", "कृष्ण", "Ram", "Sita", "Hari", "Gita", "Krishna",
+         "Dawa", "Pemba", "Laxmi", "Bishnu", "Maya"]
+FAMILY = ["थापा", "श्रेष्ठ", "गुरुङ", "तामाङ", "Thapa", "Shrestha", "Gurung", "Tamang",
+          "Sherpa", "Rai", "Magar", "Karki"]
+DISTRICTS = ["काठमाडौं", "ललितपुर", "कास्की", "Kathmandu", "Lalitpur", "Kaski", "Jhapa", "Morang"]
+
+
+def citizenship_number(rng):
+    return f"{rng.randint(1, 77):02d}-{rng.randint(1, 99):02d}-{rng.randint(60, 80):02d}-{rng.randint(0, 99999):05d}"
+
+
+def make_documents(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        name = f"{rng.choice(GIVEN)} {rng.choice(FAMILY)}"
+        entities = [
+            {"text": citizenship_number(rng), "label": "CITIZENSHIP_NUMBER", "start": 0, "end": 14},
+            {"text": name, "label": "NAME", "start": 20, "end": 20 + len(name)},
+            {"text": rng.choice(DISTRICTS), "label": "DISTRICT", "start": 60, "end": 70},
+            {"text": rng.choice(["पुरुष", "महिला"]), "label": "GENDER", "start": 40, "end": 45},
+            {"text": str(rng.randint(2010, 2060)), "label": "DATE", "start": 50, "end": 54},
+        ]
+        yield f"doc_{i:07d}.jpg", entities
+
+
+def check_reindex(store, docs):
+    """Repeated doc ids (re-runs, concatenated JSONL) must leave the FTS index consistent"""
+    sample = docs[:50]
+    before = store.stats()
+    store.add_many(sample + sample[:10] + sample, batch_size=40)
+    store.add_many([(doc_id, ents[:1]) for doc_id, ents in sample[:5]] * 2)
+    store.integrity_check()
+    store.add_many(sample[:5])
+    store.integrity_check()
+    assert store.stats() == before, (store.stats(), before)
+    name = sample[0][1][1]["text"]
+    assert sample[0][0] in store.documents("NAME", name)
+    print("re-indexing repeated doc ids: FTS integrity ok")
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    hits = 0
+    for q in queries:
+        hits += len(fn(q))
+    elapsed = time.perf_counter() - start
+    return elapsed / len(queries) * 1000, hits / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--db", default="/tmp/bench_entities.sqlite")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    store = EntityStore(args.db)
+    start = time.perf_counter()
+    store.add_many(make_documents(args.documents))
+    store.optimize()
+    elapsed = time.perf_counter() - start
+    rows = args.documents * 5
+    print(f"indexed {args.documents} documents / {rows} entities in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} entities/s)")
+
+    docs = list(make_documents(args.documents))
+    rng = random.Random(1)
+    sample = [rng.choice(docs)[1] for _ in range(args.queries)]
+    numbers = [ents[0]["text"] for ents in sample]
+    names = [ents[1]["text"] for ents in sample]
+
+    # Baseline: what finding a number in the result dumps amounts to
+    flat = [(doc_id, e) for doc_id, ents in docs for e in ents]
+
+    def scan(number):
+        norm = normalize_value("CITIZENSHIP_NUMBER", number)
+        return [d for d, e in flat
+                if e["label"] == "CITIZENSHIP_NUMBER"
+                and normalize_value(e["label"], e["text"]) == norm]
+
+    cases = [
+        ("citizenship exact", lambda q: store.lookup("CITIZENSHIP_NUMBER", q), numbers),
+        ("citizenship prefix", lambda q: store.lookup("CITIZENSHIP_NUMBER", q[:8], prefix=True, limit=50), numbers),
+        ("name exact", lambda q: store.lookup("NAME", q, limit=50), names),
+        ("name word prefix", lambda q: store.search(q.split()[1][:3], label="NAME", limit=50), names),
+        ("linear scan (exact)", scan, numbers[:5]),
+    ]
+    print(f"{'query':>22}  {'ms/query':>9}  {'hits':>6}")
+    for label, fn, queries in cases:
+        ms, hits = timed(fn, queries)
+        print(f"{label:>22}  {ms:>9.3f}  {hits:>6.1f}")
+
+    check_reindex(store, docs)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+bench_labeler.py
+WeakLabeler throughput: original per-call regex loop vs precompiled matcher,
+plus legacy-font detection on English, Unicode Nepali and Preeti card lines,
+and labeling in a spawn-started worker pool (the macOS / Windows default).
+
+Usage:
+    python benchmarks/bench_labeler.py [--docs 2000]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import pickle
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from NER.labeler.weak_labeler import WeakLabeler, Entity  # noqa: E402
+from NER.labeler.legacy_fonts import detect_legacy  # noqa: E402
+
+
+# ===============================
+# SYNTHETIC OCR TEXT
+# ===============================
+
+NEPALI_LINES = [
+    "ना.प्रजं. ३०-०१-७८-०४४८२",
+    "नाम थरः दावा शेर्पा लिङ्ग महिला",
+    "जन्म स्थानः जिल्ला : काठमाडौं नगरपालिका : काठमाडौं वडा नं. ५",
+    "सालः २०५२ महिनाः ०४ गतेः १२",
+    "नःपा : ललितपुर यडा न ३",
+    "स्थायी बासस्थान जिल्ला सप्तरी गाःवि : राजविराज",
+]
+
+ENGLISH_LINES = [
+    "Citizenship Certificate No.: 28-01-72-00911",
+    "Full Name (in block): RAM BAHADUR THAPA Sex: Male",
+    "Date of Birth (AD) Year: 1995 Month: APRIL Day: 12",
+    "Birth Place District: Kathmandu Municipality: Kathmandu Ward No. 5",
+    "Permanent Address VDC: Sankhu Ward No.: 9",
+]
+
+# English card lines that carry slashes, apostrophes and f-words but must
+# never be converted as legacy-font text
+ENGLISH_CARD_LINES = ENGLISH_LINES + [
+    "Office Certificate after",
+    "Father's Name",
+    "Date/Place: KTM/NP",
+    "Father's Name: HARI PRASAD ADHIKARI",
+    "Mother's Name: SITA KUMARI SHRESTHA",
+    "Husband's/Wife's Name: Dawa Sherpa",
+    "Issuing Officer's Signature",
+    "Government of Nepal Ministry of Home Affairs",
+    "Recipient's Signature Date of Issue: 2071/05/12",
+    "District Administration Office, Kathmandu",
+    "S/O: Gopal Prasad Dahal, Lalitpur-3",
+    "Rafiq Ansari Kafle",
+]
+
+# The same kind of lines typed in Preeti
+PREETI_LINES = [
+    "g]kfn ;/sf/",
+    "gful/stf k|df0fkq",
+    "gfd y/M bfjf z]/\\kf nlË dlxnf",
+    "hGd :yfgM hlNnf : sf7df8f}+ gu/kflnsf : sf7df8f}+ j8f g+= %",
+    ":yfoL af;:yfg hlNnf ;Kt/L ufMlj : /fhlj/fh",
+    "afa'sf] gfd y/ : /fd axfb'/ yfkf",
+    "u[x dGqfno lhNnf k|zf;g sfof{no",
+]
+
+
+def check_legacy_detection():
+    """English and Unicode Nepali lines stay as they are, Preeti lines are detected"""
+    wrong = [line for line in ENGLISH_CARD_LINES + NEPALI_LINES if detect_legacy(line)]
+    wrong += [line for line in PREETI_LINES if detect_legacy(line) is None]
+    for line in wrong:
+        print(f"legacy detection wrong: {line!r}")
+    return not wrong
+
+
+def make_corpus(n_docs, seed=0):
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(n_docs):
+        pool = rng.choice([NEPALI_LINES, ENGLISH_LINES, NEPALI_LINES + ENGLISH_LINES])
+        docs.append(" ".join(rng.sample(pool, k=min(len(pool), rng.randint(3, 6)))))
+    return docs
+
+
+# ===============================
+# REFERENCE (PRE-COMPILE) LOOP
+# ===============================
+
+NEPALI_CHARS = set('अआइईउऊऋएऐओऔकखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसहािीुूृेैोौंःँ')
+
+
+def detect_language_reference(text):
+    sample = text[:500]
+    nepali_count = sum(1 for char in sample if char in NEPALI_CHARS)
+    english_count = sum(1 for char in sample if 'A' <= char <= 'Z' or 'a' <= char <= 'z')
+    return "ne" if nepali_count > english_count else "en"
+
+
+def label_text_reference(labeler, text, language="auto"):
+    """The original label_text loop: uncompiled patterns, per-label language checks"""
+    entities = []
+    if language == "auto":
+        language = detect_language_reference(text)
+    normalized = labeler._normalize(text)
+    cleaned_text = normalized.text
+
+    for label, patterns in labeler.patterns.items():
+        if language == "ne" and label.endswith("_EN"):
+            continue
+        if language == "en" and not label.endswith("_EN"):
+            if label not in ['DATE']:
+                continue
+        for pattern in patterns:
+            try:
+                for match in re.finditer(pattern, cleaned_text, re.IGNORECASE):
+                    entity_text = match.group(1) if match.groups() else match.group(0)
+                    if entity_text:
+                        entity_text = entity_text.strip(' :.,;।\n\t')
+                        if len(entity_text) < 2:
+                            continue
+                        if labeler._is_valid_entity(label, entity_text, language):
+                            start, end = normalized.to_raw(match.start(), match.end())
+                            entities.append(Entity(entity_text, label, start, end))
+            except Exception:
+                continue
+
+    deduplicated = labeler._deduplicate_entities(entities)
+    return labeler._post_process_entities(deduplicated, language)
+
+
+def check_spawn_pool(labeler, docs):
+    """label_many in a spawn-started pool matches in-process labeling, and the labeler pickles"""
+    pickle.loads(pickle.dumps(labeler))
+    context = multiprocessing.get_context("spawn")
+    spawned = [e for _, e in labeler.label_many(docs, workers=2, chunksize=16, mp_context=context)]
+    return spawned == [labeler.label_text(d) for d in docs]
+
+
+def run(fn, docs, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(d) for d in docs]
+        best = min(best, time.perf_counter() - start)
+    return out, len(docs) / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    docs = make_corpus(args.docs)
+    labeler = WeakLabeler()
+
+    before, before_rate = run(lambda t: label_text_reference(labeler, t), docs)
+    after, after_rate = run(labeler.label_text, docs)
+
+    mismatches = sum(1 for a, b in zip(before, after) if a != b)
+
+    print(f"docs:          {len(docs)}")
+    print(f"before:        {before_rate:,.0f} docs/sec")
+    print(f"after:         {after_rate:,.0f} docs/sec")
+    print(f"speedup:       {after_rate / before_rate:.2f}x")
+    print(f"mismatches:    {mismatches}")
+
+    legacy_ok = check_legacy_detection()
+    print(f"legacy detect: {'ok' if legacy_ok else 'FAILED'}")
+
+    spawn_ok = check_spawn_pool(labeler, docs[:50])
+    print(f"spawn pool:    {'ok' if spawn_ok else 'FAILED'}")
+
+    if mismatches or not legacy_ok or not spawn_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+bench_preprocess.py
+Preprocessing latency per engine profile, at several input resolutions,
+plus OCR text agreement with the original full-resolution preprocessing.
+
+Usage:
+    python benchmarks/bench_preprocess.py [--crops 50] [--scales 1 2 4] [--real]
+
+"original" is the previous preprocess() (grayscale + unsharp mask at full
+resolution, fresh arrays each call). Agreement is the character-level
+similarity (difflib ratio) between the engine's text on a profile's output
+and its text on the original output; it needs --real (pretrained DocTR /
+EasyOCR), otherwise only latency and output size are reported.
+"""
+import os
+import sys
+import time
+import argparse
+from difflib import SequenceMatcher
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from OCR.Main_ocr import preprocess, PREPROCESS_PROFILES  # noqa: E402
+
+LINES = [
+    "Citizenship Certificate No. 28-01-72-00911",
+    "Full Name: RAM BAHADUR THAPA   Sex: Male",
+    "Birth Place: District Kathmandu, Ward No. 4",
+]
+
+
+def original(img):
+    """The previous preprocess()"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (0, 0), 3)
+    return cv2.addWeighted(gray, 1.5, blurred, -0.5, 0)
+
+
+def make_crops(n, scale, seed=0):
+    """Text blocks rendered at scan size, then upscaled like a phone photo"""
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(n):
+        h, w = 130, int(rng.integers(600, 900))
+        crop = np.full((h, w, 3), 235, np.uint8)
+        for i, line in enumerate(LINES):
+            cv2.putText(crop, line, (10, 35 + 38 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.8, (25, 25, 25), 2)
+        crop -= rng.integers(0, 10, crop.shape, dtype=np.uint8)
+        if scale != 1:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+        crops.append(crop)
+    return crops
+
+
+def timed(fn, crops, repeat=3):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(c) for c in crops]
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(crops), out
+
+
+def load_engines():
+    from doctr.models import ocr_predictor
+    import easyocr
+    from OCR.Main_ocr import to_doctr_page, doctr_text
+
+    doctr = ocr_predictor(pretrained=True)
+    reader = easyocr.Reader(["en"], gpu=False)
+
+    def run_doctr(img):
+        doc = doctr([to_doctr_page(img)])
+        return " ".join(doctr_text(p) for p in doc.pages).strip()
+
+    def run_easyocr(img):
+        return " ".join(reader.readtext(img, detail=0)).strip()
+
+    return {"doctr": run_doctr, "easyocr": run_easyocr}
+
+
+def agreement(engine, outputs, references):
+    ratios = [SequenceMatcher(None, engine(o), ref).ratio() for o, ref in zip(outputs, references)]
+    return sum(ratios) / len(ratios)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", type=int, default=50)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--real", action="store_true", help="measure OCR agreement with real engines")
+    args = parser.parse_args()
+
+    engines = load_engines() if args.real else {}
+    cv2.setNumThreads(1)
+
+    print(f"{'scale':>6}  {'profile':>10}  {'ms/crop':>8}  {'out px':>10}  {'agreement':>10}")
+    for scale in args.scales:
+        crops = make_crops(args.crops, scale)
+        base_ms, base_out = timed(original, crops)
+        print(f"{scale:>6}  {'original':>10}  {base_ms:>8.2f}  {base_out[0].size:>10}  {'-':>10}")
+
+        for profile in PREPROCESS_PROFILES:
+            ms, out = timed(lambda c: preprocess(c, profile), crops)
+            agree = "n/a"
+            engine = engines.get(profile)
+            if engine is not None:
+                references = [engine(o) for o in base_out]
+                agree = f"{agreement(engine, out, references):.3f}"
+            print(f"{scale:>6}  {profile:>10}  {ms:>8.2f}  {out[0].size:>10}  {agree:>10}")
+
+
+if __name__ == "__main__":
+    main()
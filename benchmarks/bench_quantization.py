@@ -0,0 +1,106 @@
+"""
+bench_quantization.py
+fp32 vs dynamic-int8 recognition, per engine: latency and character-level
+agreement with the fp32 output on a local sample of region crops.
+
+Usage:
+    python benchmarks/bench_quantization.py [--crops citizenship/cropped_regions]
+        [--limit 100] [--engines doctr easyocr]
+
+DocTR is run on "en"-profile crops, EasyOCR on "ne"-profile crops.
+Agreement is 1 - CER, where CER is the edit distance between the int8
+and fp32 texts divided by the fp32 length; exact is the share of crops
+whose text is identical.
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import NER.ocr_ner_pipeline as pipeline  # noqa: E402
+from OCR.Main_ocr import preprocess, profile_for_language  # noqa: E402
+from NER.labeler.gazetteer import levenshtein  # noqa: E402
+
+
+def load_crops(root, limit):
+    """Primary text crops from the cropping script's output folders"""
+    paths = []
+    for folder in sorted(os.listdir(root)):
+        path = os.path.join(root, folder)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path)):
+            if "primary" in name.lower() and name.lower().endswith(".png"):
+                paths.append(os.path.join(path, name))
+    crops = [cv2.imread(p) for p in paths[:limit]]
+    return [c for c in crops if c is not None]
+
+
+def run_doctr(images):
+    model = pipeline._load_doctr()
+    model([pipeline._to_doctr_page(images[0])])  # warm-up
+    start = time.perf_counter()
+    texts = [
+        " ".join(pipeline._doctr_text(p) for p in model([pipeline._to_doctr_page(img)]).pages).strip()
+        for img in images
+    ]
+    return texts, time.perf_counter() - start
+
+
+def run_easyocr(images):
+    reader = pipeline._load_easyocr()
+    reader.readtext(images[0], detail=0)  # warm-up
+    start = time.perf_counter()
+    texts = [" ".join(reader.readtext(img, detail=0)).strip() for img in images]
+    return texts, time.perf_counter() - start
+
+
+ENGINES = {
+    "doctr": ("en", run_doctr),
+    "easyocr": ("ne", run_easyocr),
+}
+
+
+def agreement(reference, candidate):
+    errors = sum(levenshtein(r, c) for r, c in zip(reference, candidate))
+    chars = sum(len(r) for r in reference) or 1
+    exact = sum(r == c for r, c in zip(reference, candidate)) / len(reference)
+    return max(0.0, 1 - errors / chars), exact
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", default="citizenship/cropped_regions")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    args = parser.parse_args()
+
+    crops = load_crops(args.crops, args.limit)
+    if not crops:
+        sys.exit(f"No primary crops found under {args.crops}")
+
+    print(f"{len(crops)} crops")
+    print(f"{'engine':>8}  {'fp32 ms':>8}  {'int8 ms':>8}  {'speedup':>8}  {'char agree':>10}  {'exact':>6}")
+
+    for engine in args.engines:
+        language, run = ENGINES[engine]
+        profile = profile_for_language(language)
+        images = [preprocess(c, profile) for c in crops]
+
+        pipeline.set_quantization(**{engine: False})
+        fp32_texts, fp32_s = run(images)
+        pipeline.set_quantization(**{engine: True})
+        int8_texts, int8_s = run(images)
+
+        chars, exact = agreement(fp32_texts, int8_texts)
+        n = len(images)
+        print(f"{engine:>8}  {fp32_s * 1000 / n:>8.1f}  {int8_s * 1000 / n:>8.1f}  "
+              f"{fp32_s / int8_s:>7.2f}x  {chars:>10.3f}  {exact:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
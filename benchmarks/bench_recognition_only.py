@@ -0,0 +1,118 @@
+"""
+bench_recognition_only.py
+Full engine pipelines (EasyOCR CRAFT + recognizer, DocTR detection +
+recognition) vs recognition-only OCR on projection-profile lines, per
+engine: latency per crop, segmentation cost, and accuracy.
+
+Usage:
+    python benchmarks/bench_recognition_only.py [--crops citizenship/cropped_regions]
+        [--limit 100] [--engines doctr easyocr] [--truth truth.json]
+
+Accuracy is 1 - CER. Without --truth, each mode is scored against the
+full pipeline's output (so the full pipeline scores 1.0); with --truth, a
+JSON object mapping crop paths (relative to --crops) to their text, both
+modes are scored against it.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import NER.ocr_ner_pipeline as pipeline  # noqa: E402
+from OCR.Main_ocr import preprocess, profile_for_language, segment_lines  # noqa: E402
+from NER.labeler.gazetteer import levenshtein  # noqa: E402
+from bench_quantization import agreement  # noqa: E402
+
+
+def load_crops(root, limit):
+    """(relative path, crop) for the primary text crops under root"""
+    crops = []
+    for folder in sorted(os.listdir(root)):
+        path = os.path.join(root, folder)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path)):
+            if "primary" in name.lower() and name.lower().endswith(".png"):
+                crop = cv2.imread(os.path.join(path, name))
+                if crop is not None:
+                    crops.append((f"{folder}/{name}", crop))
+    return crops[:limit]
+
+
+ENGINES = {
+    # engine: (language, router)
+    # (None is a crop the engine failed on)
+    "doctr": ("en", lambda images: [t or "" for t, _ in pipeline._ocr_english_batch(images)]),
+    "easyocr": ("ne", lambda images: [t or "" for t in pipeline._easyocr_batch(images)]),
+}
+
+
+def timed_run(router, images, recognition_only):
+    pipeline.set_recognition_only(recognition_only)
+    router(images[:1])  # warm-up: model load stays out of the numbers
+    start = time.perf_counter()
+    # One crop per call, as process_image sees a typical card region
+    texts = [router([img])[0] for img in images]
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", default="citizenship/cropped_regions")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--truth", default=None, help="JSON: crop path → ground-truth text")
+    args = parser.parse_args()
+
+    crops = load_crops(args.crops, args.limit)
+    if not crops:
+        sys.exit(f"No primary crops found under {args.crops}")
+
+    truth = None
+    if args.truth:
+        with open(args.truth, "r", encoding="utf-8") as f:
+            truth = json.load(f)
+        crops = [(path, crop) for path, crop in crops if path in truth]
+        if not crops:
+            sys.exit("No crop has a ground-truth entry")
+
+    print(f"{len(crops)} crops, accuracy vs {'ground truth' if truth else 'full pipeline'}")
+    print(f"{'engine':>8}  {'full ms':>8}  {'reco ms':>8}  {'speedup':>8}  {'segment ms':>10}  "
+          f"{'lines':>5}  {'full acc':>8}  {'reco acc':>8}  {'exact':>6}")
+
+    for engine in args.engines:
+        language, router = ENGINES[engine]
+        profile = profile_for_language(language)
+        images = [preprocess(crop, profile) for _, crop in crops]
+
+        start = time.perf_counter()
+        boxes = [segment_lines(img, words=engine == "doctr") for img in images]
+        segment_ms = (time.perf_counter() - start) * 1000 / len(images)
+
+        full_texts, full_s = timed_run(router, images, False)
+        reco_texts, reco_s = timed_run(router, images, True)
+
+        reference = [truth[path] for path, _ in crops] if truth else full_texts
+        full_acc, _ = agreement(reference, full_texts)
+        reco_acc, exact = agreement(reference, reco_texts)
+
+        n = len(images)
+        print(f"{engine:>8}  {full_s * 1000 / n:>8.1f}  {reco_s * 1000 / n:>8.1f}  "
+              f"{full_s / reco_s:>7.2f}x  {segment_ms:>10.2f}  {np.mean([len(b) for b in boxes]):>5.1f}  "
+              f"{full_acc:>8.3f}  {reco_acc:>8.3f}  {exact:>6.2f}")
+
+        worst = sorted(range(n), key=lambda i: -levenshtein(reference[i], reco_texts[i]))[:3]
+        for i in worst:
+            print(f"    {crops[i][0]}: {reference[i][:40]!r} → {reco_texts[i][:40]!r}")
+
+    pipeline.set_recognition_only(False)
+
+
+if __name__ == "__main__":
+    main()
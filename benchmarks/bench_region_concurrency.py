@@ -0,0 +1,82 @@
+"""
+bench_region_concurrency.py
+process_image latency vs number of text regions, for sequential, batched
+and thread-pool (workers=N) modes.
+
+Usage:
+    python benchmarks/bench_region_concurrency.py [--regions 1 2 4 8] [--workers 2 4] [--real]
+
+Without --real, stub engines stand in for DocTR/EasyOCR: they run a few
+OpenCV filters per crop (which, like torch inference, release the GIL)
+and return fixed text, so the scaling of the pipeline itself is measured.
+"""
+import os
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import NER.ocr_ner_pipeline as pipeline  # noqa: E402
+from stubs import Script, install  # noqa: E402
+
+
+# ===============================
+# SYNTHETIC DOCUMENT
+# ===============================
+
+def make_document(n_regions, seed=0):
+    rng = np.random.default_rng(seed)
+    height = 140 * n_regions + 40
+    image = np.full((height, 1400, 3), 230, np.uint8)
+    detections = []
+    for i in range(n_regions):
+        y1 = 20 + i * 140
+        cv2.putText(image, "Full Name (in block): RAM BAHADUR THAPA", (30, y1 + 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 2)
+        noise = rng.integers(0, 12, (120, 1300, 3), dtype=np.uint8)
+        image[y1:y1 + 120, 20:1320] -= noise
+        detections.append({"bbox": [20, y1, 1320, y1 + 120],
+                           "class": "text_block_primary", "confidence": 0.9})
+    return image, detections
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--real", action="store_true", help="use pretrained DocTR/EasyOCR")
+    args = parser.parse_args()
+
+    if not args.real:
+        install(pipeline, Script(default="Citizenship Certificate No.: 28-01-72-00911"))
+
+    header = ["regions", "sequential", "batched"] + [f"workers={w}" for w in args.workers]
+    print("  ".join(f"{h:>12}" for h in header) + "   (ms/document)")
+
+    for n in args.regions:
+        image, detections = make_document(n)
+        row = [
+            timed(lambda: pipeline.process_image(image, detections, args.language, batch=False, use_cache=False)),
+            timed(lambda: pipeline.process_image(image, detections, args.language, batch=True, use_cache=False)),
+        ]
+        for w in args.workers:
+            row.append(timed(lambda: pipeline.process_image(image, detections, args.language, workers=w, use_cache=False)))
+        print(f"{n:>12}  " + "  ".join(f"{v:>12.1f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
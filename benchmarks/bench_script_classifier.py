@@ -0,0 +1,175 @@
+"""
+bench_script_classifier.py
+Devanagari-vs-Latin crop classifier (language_detector.classify_script):
+accuracy, confidence and ms per crop on labeled text crops, logistic
+weights fitted to them for SCRIPT_WEIGHTS (held-out accuracy included),
+and per-document accuracy of the script vote (language="script") against
+the photo/fingerprint layout heuristic (language="auto").
+
+Labeled crops come from either layout:
+    <root>/ne/*.png, <root>/en/*.png (crop-level only)
+    citizenship/cropped_regions/<doc>/ (text_block_primary crops; without
+        --truth the folder is labeled from its photo / fingerprint crops,
+        i.e. by the layout heuristic itself, and ambiguous folders are left
+        out; --truth gives a JSON object mapping folder → "ne" | "en")
+
+Usage:
+    python benchmarks/bench_script_classifier.py [--crops citizenship/cropped_regions]
+        [--truth languages.json] [--fit]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from language_detector import (  # noqa: E402
+    SCRIPT_WEIGHTS, script_features, devanagari_probability, document_language,
+    get_language_from_folder,
+)
+
+
+def load_labeled(root, limit, truth=None):
+    """(language, crop path, document folder or None) per labeled crop"""
+    samples = []
+    if all(os.path.isdir(os.path.join(root, lang)) for lang in ("ne", "en")):
+        for lang in ("ne", "en"):
+            folder = os.path.join(root, lang)
+            for name in sorted(os.listdir(folder))[:limit]:
+                samples.append((lang, os.path.join(folder, name), None))
+        return samples
+
+    for doc in sorted(os.listdir(root)):
+        folder = os.path.join(root, doc)
+        if not os.path.isdir(folder):
+            continue
+        names = os.listdir(folder)
+        if truth is not None:
+            lang = truth.get(doc)
+            if lang is None:
+                continue
+        else:
+            fingerprint = any("fingerprint" in n.lower() for n in names)
+            photo = any("photo" in n.lower() for n in names)
+            if fingerprint == photo:
+                continue
+            lang = "en" if fingerprint else "ne"
+        for name in sorted(names):
+            if "primary" in name.lower() and name.lower().endswith(".png"):
+                samples.append((lang, os.path.join(folder, name), doc))
+    return samples[:limit * 2] if limit else samples
+
+
+def fit_weights(X, y, steps=3000, lr=0.5):
+    """Plain logistic regression on standardized features"""
+    mean, std = X.mean(axis=0), X.std(axis=0) + 1e-9
+    Z = (X - mean) / std
+    w, b = np.zeros(Z.shape[1]), 0.0
+    for _ in range(steps):
+        p = 1 / (1 + np.exp(-(Z @ w + b)))
+        w -= lr * Z.T @ (p - y) / len(y)
+        b -= lr * float(np.mean(p - y))
+    # Back to raw feature units
+    raw = w / std
+    return {"aspect": float(raw[0]), "headline": float(raw[1]),
+            "bias": float(b - np.sum(w * mean / std))}
+
+
+def evaluate(X, y, weights):
+    p = np.array([devanagari_probability(x, weights) for x in X])
+    predicted = p >= 0.5
+    confidence = np.where(predicted, p, 1 - p)
+    accuracy = float(np.mean(predicted == y.astype(bool)))
+    return accuracy, float(np.mean(confidence)), int(np.sum(confidence < 0.7))
+
+
+def document_accuracy(root, docs, areas, features, labels, weights):
+    """Per-document accuracy of the script vote and of the layout heuristic"""
+    by_doc = {}
+    for doc, area, f, label in zip(docs, areas, features, labels):
+        by_doc.setdefault(doc, ([], label))[0].append((area, devanagari_probability(f, weights)))
+    script_ok = layout_ok = 0
+    for doc, (votes, label) in by_doc.items():
+        truth = "ne" if label else "en"
+        # The pipeline's layout fallback defaults to English
+        layout = get_language_from_folder(os.path.join(root, doc), default="en")
+        script_ok += document_language(votes, default=layout)[0] == truth
+        layout_ok += layout == truth
+    n = len(by_doc)
+    return n, script_ok / n, layout_ok / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", default="citizenship/cropped_regions")
+    parser.add_argument("--limit", type=int, default=None, help="crops per language")
+    parser.add_argument("--truth", default=None, help="JSON: document folder → ne | en")
+    parser.add_argument("--fit", action="store_true", help="fit and print SCRIPT_WEIGHTS")
+    args = parser.parse_args()
+
+    truth = None
+    if args.truth:
+        with open(args.truth, "r", encoding="utf-8") as f:
+            truth = json.load(f)
+
+    samples = load_labeled(args.crops, args.limit, truth)
+    if not samples:
+        sys.exit(f"No labeled crops under {args.crops}")
+
+    cv2.setNumThreads(1)
+    features, labels, docs, areas, times, unusable = [], [], [], [], [], 0
+    for lang, path, doc in samples:
+        crop = cv2.imread(path)
+        if crop is None:
+            continue
+        start = time.perf_counter()
+        f = script_features(crop)
+        times.append(time.perf_counter() - start)
+        if f is None:
+            unusable += 1
+            continue
+        features.append(f)
+        labels.append(1.0 if lang == "ne" else 0.0)
+        docs.append(doc)
+        areas.append(crop.shape[0] * crop.shape[1])
+
+    X, y = np.array(features), np.array(labels)
+    ms = np.array(times) * 1000
+    print(f"{len(samples)} crops ({int(y.sum())} ne / {int(len(y) - y.sum())} en usable, "
+          f"{unusable} without letters)")
+    print(f"features: {ms.mean():.2f} ms/crop mean, p95 {np.percentile(ms, 95):.2f} ms")
+    for lang, value in (("ne", 1.0), ("en", 0.0)):
+        sel = X[y == value]
+        if len(sel):
+            print(f"  {lang}: aspect {sel[:, 0].mean():+.2f}  headline {sel[:, 1].mean():.3f}")
+
+    candidates = [("SCRIPT_WEIGHTS", SCRIPT_WEIGHTS)]
+    accuracy, confidence, unsure = evaluate(X, y, SCRIPT_WEIGHTS)
+    print(f"SCRIPT_WEIGHTS {SCRIPT_WEIGHTS}: accuracy {accuracy:.1%}, "
+          f"mean confidence {confidence:.2f}, {unsure} below 0.7")
+
+    if args.fit:
+        # Held-out estimate: fit on even crops, score on odd ones
+        held_out, _, _ = evaluate(X[1::2], y[1::2], fit_weights(X[::2], y[::2]))
+        weights = fit_weights(X, y)
+        accuracy, confidence, unsure = evaluate(X, y, weights)
+        rounded = {k: round(v, 2) for k, v in weights.items()}
+        print(f"fitted {rounded}: accuracy {accuracy:.1%} (held out {held_out:.1%}), "
+              f"mean confidence {confidence:.2f}, {unsure} below 0.7")
+        candidates.append(("fitted", weights))
+
+    if docs and docs[0] is not None:
+        source = "--truth" if truth else "the layout heuristic itself"
+        print(f"per document, labels from {source}:")
+        for name, weights in candidates:
+            n, script_acc, layout_acc = document_accuracy(args.crops, docs, areas, X, y, weights)
+            print(f"  {name:>14}: script vote {script_acc:.1%}  layout {layout_acc:.1%}  ({n} documents)")
+
+
+if __name__ == "__main__":
+    main()
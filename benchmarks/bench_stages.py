@@ -0,0 +1,275 @@
+"""
+bench_stages.py
+Per-stage timings of the document pipeline on synthetic bilingual cards:
+decode, detect, crop, preprocess, OCR, NER, plus process_image end to end.
+
+Usage:
+    python benchmarks/bench_stages.py [--cards 40] [--cost heavy]
+        [--detector stub|torch|onnx] [--ocr stub|real] [--recognition-only]
+        [--output benchmarks/results/stages-<commit>.json]
+        [--compare benchmarks/results/stages-<other>.json]
+
+With the default stubs it runs offline without model weights: the stub
+detector returns each card's known layout, and stub OCR returns its
+ground-truth text after spending --cost worth of OpenCV work per crop.
+--recognition-only also times the recognition-only OCR path (engine
+recognizers on projection-profile boxes, see set_recognition_only) and
+reports both modes side by side; the stubs then spend their cost on the
+boxes only. Results (ms per card for each stage) go to a JSON file;
+--compare prints the ratio against an earlier run. Before timing, the
+region prefilter is checked on the cards' text crops, their inverted
+copies (light text on a dark band) and crops it must skip.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import NER.ocr_ner_pipeline as pipeline  # noqa: E402
+from OCR.Main_ocr import preprocess, profile_for_language, segment_lines  # noqa: E402
+from detection import load_detector  # noqa: E402
+from stubs import COSTS, Script, StubDetector, install  # noqa: E402
+from synthetic_cards import make_cards  # noqa: E402
+
+STAGES = ["decode", "detect", "crop", "preprocess", "ocr", "ner", "end_to_end"]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def summarize(samples):
+    ms = np.array(samples) * 1000
+    return {
+        "n": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "total_s": float(ms.sum() / 1000),
+    }
+
+
+class Timer:
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    def run(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples[stage].append(time.perf_counter() - start)
+        return result
+
+
+def text_crops(image, detections):
+    crops = []
+    for det in detections:
+        if det["class"] != "text_block_primary":
+            continue
+        x1, y1, x2, y2 = det["bbox"]
+        crop = image[y1:y2, x1:x2]
+        if crop.size and pipeline.region_skip_reason(crop) is None:
+            crops.append(crop)
+    return crops
+
+
+def check_prefilter(cards):
+    """Text crops pass in either polarity; tiny, flat and inkless crops are skipped"""
+    failures = []
+    for i, card in enumerate(cards):
+        for det in card.detections:
+            if det["class"] != "text_block_primary":
+                continue
+            x1, y1, x2, y2 = det["bbox"]
+            crop = card.image[y1:y2, x1:x2]
+            for polarity, sample in (("text", crop), ("inverted text", cv2.bitwise_not(crop))):
+                reason = pipeline.region_skip_reason(sample)
+                if reason is not None:
+                    failures.append(f"card {i}: {polarity} crop skipped as {reason}")
+
+    rng = np.random.default_rng(0)
+    noise = np.clip(rng.normal(200, 10, (60, 300)), 170, 230).astype(np.uint8)
+    expected = [
+        ("too_small", np.full((5, 300), 255, np.uint8)),
+        ("low_contrast", np.full((60, 300), 128, np.uint8)),
+        ("low_ink", noise),  # paper grain: textured, nothing stands out
+    ]
+    for reason, crop in expected:
+        got = pipeline.region_skip_reason(crop)
+        if got != reason:
+            failures.append(f"{reason} crop: got {got}")
+
+    for failure in failures:
+        print(f"prefilter: {failure}")
+    return not failures
+
+
+def scripted_texts(card, processed, recognition_only):
+    """What the stub engines hand out for one card's crops, in call order"""
+    if not (recognition_only and card.language == "en"):
+        return card.region_texts
+    # DocTR recognition reads word boxes in one call: the crop's text goes on
+    # its first box. Crops without boxes read nothing and fall back to EasyOCR
+    texts, fallback = [], []
+    for text, img in zip(card.region_texts, processed):
+        n = len(segment_lines(img, words=True))
+        if n:
+            texts.extend([text] + [""] * (n - 1))
+        else:
+            fallback.append(text)
+    return texts + fallback
+
+
+def run(cards, detector, layouts, texts, stub_ocr, repeat, recognition_only=False):
+    labeler = pipeline._load_labeler()
+    encoded = [cv2.imencode(".png", card.image)[1] for card in cards]
+    timer = Timer()
+    entities = 0
+
+    for _ in range(repeat):
+        for card, data in zip(cards, encoded):
+            image = timer.run("decode", cv2.imdecode, data, cv2.IMREAD_COLOR)
+
+            layouts.expect([card.detections])
+            detections = timer.run("detect", detector.detect, image)
+
+            crops = timer.run("crop", text_crops, image, detections)
+
+            profile = profile_for_language(card.language)
+            processed = timer.run("preprocess", lambda: [preprocess(c, profile) for c in crops])
+
+            if stub_ocr:
+                script = scripted_texts(card, processed, recognition_only)
+                texts.clear()
+                texts.expect(script)
+            results = timer.run("ocr", pipeline._ocr_regions_batched, processed, card.language)
+            full_text = " ".join(t for t, _ in results if t)
+
+            entities += len(timer.run("ner", labeler.label_text, full_text))
+
+            if stub_ocr:
+                texts.clear()
+                texts.expect(script)
+            timer.run("end_to_end", pipeline.process_image, image, detections,
+                      language=card.language, use_cache=False)
+
+    return timer, entities
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline.get('commit')} ({baseline_path})")
+    print(f"{'stage':>12}  {'before ms':>10}  {'after ms':>10}  {'ratio':>7}")
+    for stage in STAGES:
+        before = baseline["stages"].get(stage, {}).get("mean_ms")
+        after = current["stages"][stage]["mean_ms"]
+        if before:
+            print(f"{stage:>12}  {before:>10.2f}  {after:>10.2f}  {after / before:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cost", default="heavy", choices=list(COSTS),
+                        help="CPU work per crop in the stub OCR engines")
+    parser.add_argument("--detector", default="stub", choices=["stub", "torch", "onnx"])
+    parser.add_argument("--ocr", default="stub", choices=["stub", "real"])
+    parser.add_argument("--recognition-only", action="store_true",
+                        help="also time recognition-only OCR and report both modes")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare with")
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards, seed=args.seed)
+
+    layouts = Script(default=[])
+    detector = StubDetector(layouts) if args.detector == "stub" else load_detector(args.detector)
+
+    texts = Script(default="")
+    stub_ocr = args.ocr == "stub"
+    if stub_ocr:
+        install(pipeline, texts, COSTS[args.cost])
+
+    if not check_prefilter(cards):
+        sys.exit(1)
+
+    cv2.setNumThreads(1)
+    modes = [False, True] if args.recognition_only else [False]
+    timers = {}
+    for recognition_only in modes:
+        pipeline.set_recognition_only(recognition_only)
+        # Warm-up: lazy loads (labeler, engines) stay out of the numbers
+        run(cards[:2], detector, layouts, texts, stub_ocr, 1, recognition_only)
+        layouts.clear()
+        timers[recognition_only] = run(cards, detector, layouts, texts, stub_ocr,
+                                       args.repeat, recognition_only)
+    pipeline.set_recognition_only(False)
+    timer, entities = timers[False]
+
+    commit = git_commit()
+    result = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {
+            "cards": args.cards, "repeat": args.repeat, "seed": args.seed,
+            "cost": args.cost, "detector": args.detector, "ocr": args.ocr,
+            "recognition_only": args.recognition_only,
+        },
+        "entities_per_card": entities / (args.cards * args.repeat),
+        "stages": {stage: summarize(timer.samples[stage]) for stage in STAGES},
+    }
+    if args.recognition_only:
+        reco_timer, reco_entities = timers[True]
+        result["recognition_only"] = {
+            "entities_per_card": reco_entities / (args.cards * args.repeat),
+            "stages": {stage: summarize(reco_timer.samples[stage]) for stage in STAGES},
+        }
+
+    output = args.output or os.path.join("benchmarks", "results", f"stages-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{'stage':>12}  {'mean ms':>9}  {'p50 ms':>9}  {'p95 ms':>9}")
+    for stage in STAGES:
+        s = result["stages"][stage]
+        print(f"{stage:>12}  {s['mean_ms']:>9.2f}  {s['p50_ms']:>9.2f}  {s['p95_ms']:>9.2f}")
+    print(f"entities/card: {result['entities_per_card']:.1f}")
+
+    if args.recognition_only:
+        reco = result["recognition_only"]
+        print(f"\n{'stage':>12}  {'full ms':>9}  {'reco ms':>9}  {'ratio':>7}")
+        for stage in STAGES:
+            full_ms = result["stages"][stage]["mean_ms"]
+            reco_ms = reco["stages"][stage]["mean_ms"]
+            ratio = f"{reco_ms / full_ms:>6.2f}x" if full_ms else f"{'-':>7}"
+            print(f"{stage:>12}  {full_ms:>9.2f}  {reco_ms:>9.2f}  {ratio}")
+        print(f"entities/card: {result['entities_per_card']:.1f} full, "
+              f"{reco['entities_per_card']:.1f} recognition-only")
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+load_test.py
+Concurrent load against the HTTP service (src/service.py), with a plain
+asyncio client: throughput, latency percentiles, 429s and errors.
+
+Usage:
+    # against a running service
+    python benchmarks/load_test.py --port 8080 [--images citizenship/images]
+    # self-contained: starts the service in-process with stub engines
+    python benchmarks/load_test.py --stub [--max-batch 8] [--max-wait-ms 20]
+
+Common options: --clients 16 --requests 200 --language auto
+Without --images, synthetic cards (PNG) are sent.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+def load_payloads(folder, limit=32):
+    if folder:
+        exts = (".jpg", ".jpeg", ".png")
+        names = sorted(n for n in os.listdir(folder) if n.lower().endswith(exts))[:limit]
+        payloads = []
+        for name in names:
+            with open(os.path.join(folder, name), "rb") as f:
+                payloads.append(f.read())
+        return payloads, None
+
+    from synthetic_cards import make_cards
+    cards = make_cards(min(limit, 8))
+    return [cv2.imencode(".png", c.image)[1].tobytes() for c in cards], cards
+
+
+async def post(host, port, path, body):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def client(host, port, path, payloads, todo, latencies, statuses):
+    while todo:
+        i = todo.pop()
+        start = time.perf_counter()
+        try:
+            status = await post(host, port, path, payloads[i % len(payloads)])
+        except OSError:
+            status = "connection error"
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def start_stub_service(cards, args):
+    """In-process service with stub detector/OCR: measures the serving path itself"""
+    import NER.ocr_ner_pipeline as pipeline
+    from service import Service
+    from stubs import COSTS, Script, StubDetector, install
+
+    install(pipeline, Script(default=" ".join(cards[0].region_texts)), COSTS[args.cost])
+    detector = StubDetector(Script(default=cards[0].detections))
+    service = Service(detector, max_batch=args.max_batch,
+                      max_wait=args.max_wait_ms / 1000, max_queue=args.max_queue)
+    server = await service.start("127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], service
+
+
+async def main(args):
+    payloads, cards = load_payloads(args.images)
+    host, port, server, service = args.host, args.port, None, None
+    if args.stub:
+        if cards is None:
+            from synthetic_cards import make_cards
+            cards = make_cards(1)
+        server, port, service = await start_stub_service(cards, args)
+
+    path = f"/ocr?language={args.language}"
+    todo = list(range(args.requests))
+    latencies, statuses = [], {}
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(host, port, path, payloads, todo, latencies, statuses)
+        for _ in range(args.clients)
+    ])
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.close()
+
+    ok = statuses.get(200, 0)
+    print(f"{args.requests} requests, {args.clients} clients, {elapsed:.2f}s")
+    print(f"throughput: {ok / elapsed:.1f} ok/s")
+    if latencies:
+        ms = np.array(latencies) * 1000
+        print(f"latency ms: p50 {np.percentile(ms, 50):.1f}  p95 {np.percentile(ms, 95):.1f}  "
+              f"p99 {np.percentile(ms, 99):.1f}  max {ms.max():.1f}")
+    print("status counts:", dict(sorted(statuses.items(), key=str)))
+    if service is not None:
+        print(f"batches: {service.batches} (mean size {ok / max(service.batches, 1):.1f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--images", default=None)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--language", default="auto", choices=["auto", "en", "ne", "script"])
+    parser.add_argument("--stub", action="store_true", help="start an in-process service with stub engines")
+    parser.add_argument("--cost", default="light", help="stub OCR cost: none | light | heavy")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--max-queue", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,117 @@
+"""
+stubs.py
+Offline stand-ins for DocTR, EasyOCR and the YOLO detector.
+
+Stub engines return scripted text in call order (or a fixed default) and
+spend CPU on each image with OpenCV filters, which, like torch inference,
+release the GIL. `rounds` sets that cost: 0 measures only the pipeline.
+The recognition-only entry points (DocTR reco_predictor, EasyOCR
+recognize) spend it on the word / line boxes they are given instead of
+the whole crop, as the real recognizers skip text detection.
+"""
+import os
+import sys
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from detection import Detector  # noqa: E402
+
+# Named engine costs (filter rounds per image)
+COSTS = {"none": 0, "light": 2, "heavy": 6}
+
+
+def burn(img, rounds):
+    out = img
+    for _ in range(rounds):
+        out = cv2.GaussianBlur(out, (0, 0), 2)
+        out = cv2.resize(out, None, fx=1.5, fy=1.5)
+        out = cv2.resize(out, (img.shape[1], img.shape[0]))
+    return out
+
+
+class Script:
+    """Values handed out in call order; `default` once the script runs out"""
+
+    def __init__(self, default=None):
+        self.default = default
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+    def expect(self, values):
+        with self._lock:
+            self._queue.extend(values)
+
+    def next(self):
+        with self._lock:
+            return self._queue.popleft() if self._queue else self.default
+
+    def clear(self):
+        with self._lock:
+            self._queue.clear()
+
+
+def _doctr_page(text):
+    words = [SimpleNamespace(value=w, confidence=0.9) for w in text.split()]
+    line = SimpleNamespace(words=words)
+    return SimpleNamespace(blocks=[SimpleNamespace(lines=[line])])
+
+
+class StubDoctr:
+    def __init__(self, script, rounds=COSTS["heavy"]):
+        self.script = script
+        self.rounds = rounds
+
+    def __call__(self, pages):
+        for page in pages:
+            burn(page, self.rounds)
+        return SimpleNamespace(pages=[_doctr_page(self.script.next()) for _ in pages])
+
+    def reco_predictor(self, words):
+        """(value, confidence) per word crop, one script value each"""
+        for word in words:
+            burn(word, self.rounds)
+        return [(self.script.next(), 0.9) for _ in words]
+
+
+class StubEasyOCR:
+    def __init__(self, script, rounds=COSTS["heavy"]):
+        self.script = script
+        self.rounds = rounds
+
+    def readtext(self, img, detail=0):
+        burn(img, self.rounds)
+        text = self.script.next()
+        return [text] if text else []
+
+    def readtext_batched(self, images, detail=0):
+        return [self.readtext(img) for img in images]
+
+    def recognize(self, img, horizontal_list=None, free_list=None, detail=0, batch_size=1):
+        """One script value per call (per crop); boxes are [x1, x2, y1, y2]"""
+        for x1, x2, y1, y2 in horizontal_list or []:
+            burn(img[y1:y2, x1:x2], self.rounds)
+        text = self.script.next()
+        return [text] if text and horizontal_list else []
+
+
+class StubDetector(Detector):
+    """Returns scripted layouts, one per image"""
+
+    backend = "stub"
+
+    def __init__(self, script):
+        self.script = script
+
+    def detect_batch(self, images):
+        return [self.script.next() or [] for _ in images]
+
+
+def install(pipeline, script, rounds=COSTS["heavy"]):
+    """Swap the pipeline's engines for stubs sharing one text script"""
+    pipeline._doctr_model = StubDoctr(script, rounds)
+    pipeline._easy_reader = StubEasyOCR(script, rounds)
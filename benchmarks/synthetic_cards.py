@@ -0,0 +1,165 @@
+"""
+synthetic_cards.py
+Synthetic Nepali/English citizenship cards for offline benchmarks.
+
+Field values come from the labeler's gazetteer vocabularies (districts,
+months, gender) and the card templates its patterns are written for.
+Nepali text is drawn in its legacy-font (Preeti) ASCII encoding, built by
+reversing the Fonts/map.json character map, which is how legacy-font
+cards carry their glyphs; the Unicode text is kept as ground truth.
+
+Each card comes with its layout (detection dicts) and the ground-truth
+text of every text_block_primary region, in detection order.
+"""
+import os
+import re
+import sys
+import json
+from dataclasses import dataclass
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from NER.labeler.gazetteer import load_gazetteers  # noqa: E402
+from NER.labeler.legacy_fonts import DEFAULT_MAP_PATH, DEFAULT_FONT  # noqa: E402
+
+NAMES_NE = ["राम बहादुर थापा", "सीता कुमारी श्रेष्ठ", "दावा शेर्पा", "हरि प्रसाद अधिकारी"]
+NAMES_EN = ["RAM BAHADUR THAPA", "SITA KUMARI SHRESTHA", "DAWA SHERPA", "HARI PRASAD ADHIKARI"]
+NE_DIGITS = str.maketrans("0123456789", "०१२३४५६७८९")
+
+
+@dataclass
+class Card:
+    language: str
+    image: np.ndarray
+    detections: List[Dict]
+    region_texts: List[str]
+
+    @property
+    def text(self):
+        return " ".join(self.region_texts)
+
+
+# ===============================
+# LEGACY ENCODING
+# ===============================
+
+def legacy_encoder(font=DEFAULT_FONT, path=DEFAULT_MAP_PATH):
+    """Unicode → legacy ASCII, longest Unicode sequence first; unmapped chars pass through"""
+    with open(path, "r", encoding="utf-8") as f:
+        char_map = json.load(f)[font]["rules"]["character-map"]
+    reverse = {}
+    for legacy, unicode in char_map.items():
+        if unicode.strip() and unicode not in reverse:
+            reverse[unicode] = legacy
+    pattern = re.compile("|".join(map(re.escape, sorted(reverse, key=len, reverse=True))))
+    return lambda text: pattern.sub(lambda m: reverse[m.group(0)], text)
+
+
+# ===============================
+# FIELD VALUES
+# ===============================
+
+class FieldSampler:
+    def __init__(self, rng):
+        self.rng = rng
+        gazetteers = load_gazetteers()
+        self.districts = gazetteers["DISTRICT"].canonical_names
+        self.districts_en = [k for k in gazetteers["DISTRICT"].keys if k.isascii()]
+        self.genders = gazetteers["GENDER"].canonical_names
+        self.genders_en = gazetteers["GENDER_EN"].canonical_names
+        self.months_en = gazetteers["MONTH_EN"].canonical_names
+
+    def pick(self, values):
+        return values[int(self.rng.integers(len(values)))]
+
+    def number(self):
+        parts = [self.rng.integers(1, 78), self.rng.integers(1, 13),
+                 self.rng.integers(60, 80), self.rng.integers(0, 100000)]
+        return f"{parts[0]:02d}-{parts[1]:02d}-{parts[2]:02d}-{parts[3]:05d}"
+
+    def nepali_lines(self):
+        year = str(int(self.rng.integers(2030, 2060))).translate(NE_DIGITS)
+        month = str(int(self.rng.integers(1, 13))).translate(NE_DIGITS)
+        day = str(int(self.rng.integers(1, 32))).translate(NE_DIGITS)
+        ward = str(int(self.rng.integers(1, 20))).translate(NE_DIGITS)
+        return [
+            [f"ना.प्रजं. {self.number().translate(NE_DIGITS)}"],
+            [f"नाम थरः {self.pick(NAMES_NE)} लिङ्ग {self.pick(self.genders)}"],
+            [f"जिल्ला : {self.pick(self.districts)}", f"वडा नं. {ward}"],
+            [f"सालः {year} महिनाः {month} गतेः {day}"],
+        ]
+
+    def english_lines(self):
+        return [
+            [f"Citizenship Certificate No.: {self.number()}"],
+            [f"Full Name (in block): {self.pick(NAMES_EN)} Sex: {self.pick(self.genders_en)}"],
+            [f"Date of Birth (AD): Year: {int(self.rng.integers(1960, 2005))}",
+             f"Month: {self.pick(self.months_en)} Day: {int(self.rng.integers(1, 29))}"],
+            [f"Birth Place: District: {self.pick(self.districts_en).title()}"],
+        ]
+
+
+# ===============================
+# RENDERING
+# ===============================
+
+def _blob(image, bbox, cls, rng):
+    """Dark textured patch standing in for a photo or fingerprint"""
+    x1, y1, x2, y2 = bbox
+    image[y1:y2, x1:x2] = 60 + rng.integers(0, 60, (y2 - y1, x2 - x1, 3), dtype=np.uint8)
+    return {"bbox": list(bbox), "class": cls, "confidence": 0.9}
+
+
+def make_card(sampler, encode, language, width=1100, line_height=40, scale=0.7):
+    rng = sampler.rng
+    groups = sampler.nepali_lines() if language == "ne" else sampler.english_lines()
+    n_lines = sum(len(g) for g in groups)
+    height = 80 + n_lines * line_height + len(groups) * 20 + 40
+
+    image = np.full((height, width, 3), 228, np.uint8)
+    image -= rng.integers(0, 12, image.shape, dtype=np.uint8)
+
+    detections = [{"bbox": [5, 5, width - 5, height - 5], "class": "Id_card_boundary", "confidence": 0.95}]
+    header = "नेपाल सरकार" if language == "ne" else "Government of Nepal"
+    cv2.putText(image, encode(header), (width // 3, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (30, 30, 30), 2)
+    detections.append({"bbox": [width // 3 - 10, 15, width // 3 + 360, 60],
+                       "class": "header_text_block", "confidence": 0.9})
+
+    region_texts = []
+    y = 80
+    text_right = width - 260
+    for group in groups:
+        top = y
+        for line in group:
+            drawn = encode(line) if language == "ne" else line
+            cv2.putText(image, drawn, (30, y + 28), cv2.FONT_HERSHEY_SIMPLEX, scale, (20, 20, 20), 2)
+            y += line_height
+        detections.append({"bbox": [20, top, text_right, y + 6],
+                           "class": "text_block_primary", "confidence": 0.9})
+        region_texts.append(" ".join(group))
+        y += 20
+
+    # Photo on Nepali fronts, fingerprints on English backs (drives language detection)
+    side = "photo_region" if language == "ne" else "fingerprint_region"
+    detections.append(_blob(image, (width - 220, 80, width - 30, 300), side, rng))
+
+    return Card(language, image, detections, region_texts)
+
+
+def make_cards(n, seed=0, languages=("ne", "en")):
+    rng = np.random.default_rng(seed)
+    sampler = FieldSampler(rng)
+    encode = legacy_encoder()
+    return [make_card(sampler, encode, languages[i % len(languages)]) for i in range(n)]
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else "benchmarks/results/cards"
+    os.makedirs(out, exist_ok=True)
+    for i, card in enumerate(make_cards(6)):
+        cv2.imwrite(os.path.join(out, f"card_{i}_{card.language}.png"), card.image)
+        print(card.language, card.text)
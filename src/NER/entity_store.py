@@ -0,0 +1,339 @@
+"""
+entity_store.py
+Indexed store of extracted entities across processed documents (SQLite).
+
+    documents  one row per document id (file name, folder, ...)
+    entities   label, raw text, normalized value, canonical value, span
+    entities_fts  FTS5 index over the normalized names and places (word prefixes)
+
+Lookups:
+- exact / prefix on the whole normalized value, through a B-tree index on
+  (kind, norm); kind is the label without its _EN suffix, so
+  CITIZENSHIP_NUMBER finds both scripts
+- search: every query word as a word prefix, through FTS5 ("ram thap"
+  finds "Ram Bahadur Thapa"); names and places only (FTS_KINDS)
+
+Citizenship numbers are normalized to ASCII digits only, so
+"२८-०१-७२-००९११", "28 01 72 00911" and "28-01-72-00911" are the same value.
+Re-indexing a document replaces its earlier entities.
+
+    python -m NER.entity_store index Result/stream_results.jsonl
+    python -m NER.entity_store lookup CITIZENSHIP_NUMBER 28-01-72-00911
+    python -m NER.entity_store lookup CITIZENSHIP_NUMBER 28-01 --prefix
+    python -m NER.entity_store search "ram thap" --label NAME
+"""
+import os
+import re
+import json
+import sqlite3
+import threading
+import unicodedata
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+from NER.labeler.normalizer import DEVANAGARI_DIGITS, ASCII_DIGITS
+
+DEFAULT_PATH = "Result/entities.sqlite"
+
+SCHEMA_VERSION = 1
+
+_TO_ASCII = str.maketrans(DEVANAGARI_DIGITS, ASCII_DIGITS)
+_NON_DIGIT = re.compile(r'\D+')
+_SPACES = re.compile(r'\s+')
+
+# Devanagari vowel signs are category M: keep them inside tokens
+_TOKENIZER = "unicode61 remove_diacritics 0 categories 'L* N* Co M*'"
+
+# Word search only makes sense for free text; numbers, dates and gender go
+# through lookup() alone, which keeps the FTS index (and bulk loads) small
+FTS_KINDS = ("NAME", "DISTRICT", "MUNICIPALITY")
+_FTS_KINDS_SQL = ", ".join(f"'{k}'" for k in FTS_KINDS)
+
+
+def entity_kind(label):
+    return label[:-3] if label.endswith("_EN") else label
+
+
+def normalize_value(label, text):
+    """Lookup form of an entity value (also applied to queries)"""
+    text = unicodedata.normalize("NFC", text or "")
+    if entity_kind(label) == "CITIZENSHIP_NUMBER":
+        return _NON_DIGIT.sub("", text.translate(_TO_ASCII))
+    return _SPACES.sub(" ", text).strip().casefold()
+
+
+def _prefix_end(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix + "\U0010ffff"
+
+
+@dataclass
+class EntityHit:
+    doc_id: str
+    label: str
+    text: str
+    canonical: Optional[str]
+    start: int
+    end: int
+
+
+class EntityStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._create()
+
+    def _create(self):
+        with self._db:
+            self._db.executescript(f"""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    doc_id TEXT NOT NULL UNIQUE
+                );
+                CREATE TABLE IF NOT EXISTS entities (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    doc INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+                    kind TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    norm TEXT NOT NULL,
+                    canonical TEXT,
+                    start INTEGER,
+                    "end" INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS entities_lookup ON entities(kind, norm);
+                CREATE INDEX IF NOT EXISTS entities_doc ON entities(doc);
+
+                CREATE VIEW IF NOT EXISTS entity_words AS
+                    SELECT id, norm FROM entities WHERE kind IN ({_FTS_KINDS_SQL});
+                CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+                    norm, content='entity_words', content_rowid='id',
+                    tokenize="{_TOKENIZER}", prefix='2 3'
+                );
+                CREATE TRIGGER IF NOT EXISTS entities_ad AFTER DELETE ON entities
+                WHEN old.kind IN ({_FTS_KINDS_SQL}) BEGIN
+                    INSERT INTO entities_fts(entities_fts, rowid, norm)
+                    VALUES ('delete', old.id, old.norm);
+                END;
+                PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+
+    # ===============================
+    # INDEXING
+    # ===============================
+
+    @staticmethod
+    def _row(entity):
+        """Entity dataclass (process_image) or its dict (JSON/JSONL results)"""
+        if not isinstance(entity, dict):
+            entity = asdict(entity)
+        label = entity["label"]
+        return (
+            entity_kind(label), label, entity["text"],
+            normalize_value(label, entity["text"]),
+            entity.get("canonical"), entity.get("start"), entity.get("end"),
+        )
+
+    def _insert(self, doc_id, entities):
+        self._db.execute(
+            "DELETE FROM entities WHERE doc = (SELECT id FROM documents WHERE doc_id = ?)",
+            (doc_id,),
+        )
+        self._db.execute("INSERT OR IGNORE INTO documents (doc_id) VALUES (?)", (doc_id,))
+        doc = self._db.execute("SELECT id FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()[0]
+        self._db.executemany(
+            'INSERT INTO entities (doc, kind, label, text, norm, canonical, start, "end")'
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(doc,) + self._row(e) for e in entities],
+        )
+
+    def add(self, doc_id, entities):
+        """Index one document's entities, replacing any earlier ones"""
+        self.add_many([(doc_id, entities)])
+
+    def add_many(self, documents, batch_size=1000):
+        """
+        documents: iterable of (doc_id, entities). One transaction per
+        batch_size documents; returns the number of documents indexed.
+        """
+        n = 0
+        batch = []
+        for item in documents:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                n += self._commit_batch(batch)
+                batch = []
+        if batch:
+            n += self._commit_batch(batch)
+        return n
+
+    def _commit_batch(self, batch):
+        # Last entry per doc_id only: re-inserting a document within the batch
+        # would delete rows the FTS index has not seen yet (re-runs, or
+        # concatenated result files, repeat ids)
+        latest = {}
+        for doc_id, entities in batch:
+            latest.pop(doc_id, None)
+            latest[doc_id] = entities
+
+        with self._lock, self._db:
+            last = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM entities").fetchone()[0]
+            for doc_id, entities in latest.items():
+                self._insert(doc_id, entities)
+            # One FTS insert per batch: a per-row trigger triples load time.
+            # AUTOINCREMENT ids never reuse deleted ones, so "> last" is this batch
+            self._db.execute(
+                "INSERT INTO entities_fts(rowid, norm) SELECT id, norm FROM entity_words WHERE id > ?",
+                (last,),
+            )
+        return len(latest)
+
+    def remove(self, doc_id):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    # ===============================
+    # LOOKUP
+    # ===============================
+
+    _SELECT = (
+        'SELECT d.doc_id, e.label, e.text, e.canonical, e.start, e."end"'
+        " FROM entities e JOIN documents d ON d.id = e.doc"
+    )
+
+    def _hits(self, sql, params):
+        with self._lock:
+            return [EntityHit(*row) for row in self._db.execute(sql, params)]
+
+    def lookup(self, label, value, prefix=False, limit=100) -> List[EntityHit]:
+        """Entities of this kind whose whole normalized value equals (or starts with) value"""
+        kind = entity_kind(label)
+        norm = normalize_value(label, value)
+        if not norm:
+            return []
+        if prefix:
+            return self._hits(
+                self._SELECT + " WHERE e.kind = ? AND e.norm >= ? AND e.norm < ?"
+                " ORDER BY e.norm LIMIT ?",
+                (kind, norm, _prefix_end(norm), limit),
+            )
+        return self._hits(
+            self._SELECT + " WHERE e.kind = ? AND e.norm = ? LIMIT ?",
+            (kind, norm, limit),
+        )
+
+    def search(self, query, label=None, limit=100) -> List[EntityHit]:
+        """Entities containing a word starting with each query word"""
+        words = normalize_value("", query).split()
+        if not words:
+            return []
+        match = " AND ".join('"{}"*'.format(w.replace('"', '""')) for w in words)
+        # CROSS JOIN pins the FTS index as the outer loop: rows stream out of
+        # it and stop at LIMIT, instead of scanning every entity of the kind
+        sql = (
+            'SELECT d.doc_id, e.label, e.text, e.canonical, e.start, e."end"'
+            " FROM entities_fts f CROSS JOIN entities e ON e.id = f.rowid"
+            " CROSS JOIN documents d ON d.id = e.doc WHERE entities_fts MATCH ?"
+        )
+        params = [match]
+        if label:
+            sql += " AND e.kind = ?"
+            params.append(entity_kind(label))
+        return self._hits(sql + " LIMIT ?", params + [limit])
+
+    def documents(self, label, value, prefix=False):
+        """Ids of the documents holding a matching entity"""
+        return sorted({h.doc_id for h in self.lookup(label, value, prefix, limit=-1)})
+
+    def stats(self):
+        with self._lock:
+            docs = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            rows = self._db.execute(
+                "SELECT kind, COUNT(*) FROM entities GROUP BY kind ORDER BY kind"
+            ).fetchall()
+        return {"documents": docs, "entities": dict(rows)}
+
+    def integrity_check(self):
+        """Raises sqlite3.DatabaseError if the FTS index disagrees with the entities"""
+        with self._lock:
+            self._db.execute("INSERT INTO entities_fts(entities_fts, rank) VALUES ('integrity-check', 1)")
+
+    def optimize(self):
+        """Merge FTS segments after large loads"""
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO entities_fts(entities_fts) VALUES ('optimize')")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# ===============================
+# RESULT FILES
+# ===============================
+
+def read_stream_results(path):
+    """(file, entities) from stream_pipeline JSONL output"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "entities" in record:
+                yield record["file"], record["entities"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Index and query extracted entities")
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    index = sub.add_parser("index", help="index stream_pipeline JSONL results")
+    index.add_argument("results", nargs="+")
+
+    find = sub.add_parser("lookup", help="exact (or --prefix) value lookup")
+    find.add_argument("label", help="e.g. CITIZENSHIP_NUMBER, NAME, DISTRICT")
+    find.add_argument("value")
+    find.add_argument("--prefix", action="store_true")
+
+    words = sub.add_parser("search", help="word-prefix search")
+    words.add_argument("query")
+    words.add_argument("--label", default=None)
+
+    sub.add_parser("stats")
+    sub.add_parser("check", help="verify the FTS index against the entities")
+
+    args = parser.parse_args()
+    store = EntityStore(args.db)
+
+    if args.command == "index":
+        for path in args.results:
+            n = store.add_many(read_stream_results(path))
+            print(f"{path}: {n} documents")
+        store.optimize()
+    elif args.command == "stats":
+        print(store.stats())
+    elif args.command == "check":
+        store.integrity_check()
+        print("ok")
+    else:
+        if args.command == "lookup":
+            hits = store.lookup(args.label, args.value, prefix=args.prefix)
+        else:
+            hits = store.search(args.query, label=args.label)
+        for hit in hits:
+            print(f"{hit.doc_id}\t{hit.label}\t{hit.text}\t[{hit.start}:{hit.end}]")
+        print(f"{len(hits)} hits")
+
+    store.close()
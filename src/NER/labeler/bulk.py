@@ -0,0 +1,132 @@
+# bulk.py
+"""
+Bulk labeling over large corpora.
+
+Texts are read lazily (list, generator or JSONL file), labeled in chunks
+across a process pool and yielded back in input order. Each worker builds
+its own labeler once, at pool start-up, from the parent's constructor
+arguments (nothing compiled is pickled across), and only a bounded number
+of chunks are in flight, so memory stays flat on very large inputs.
+"""
+import os
+import json
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Per-process labeler, set by _init_worker
+_worker_labeler = None
+
+
+# ===============================
+# INPUT
+# ===============================
+
+def iter_texts(source, text_key="text"):
+    """
+    Yield texts from a JSONL path or any iterable.
+
+    JSONL lines are decoded one at a time; items that are dicts use
+    `text_key`, anything else is passed through as the text.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                yield _record_text(json.loads(line), text_key)
+    else:
+        for item in source:
+            yield _record_text(item, text_key)
+
+
+def _record_text(record, text_key):
+    if isinstance(record, dict):
+        return record.get(text_key) or ""
+    return record
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ===============================
+# WORKER
+# ===============================
+
+def _init_worker(labeler_args, language, gazetteer_version):
+    global _worker_labeler
+    from NER.labeler.weak_labeler import WeakLabeler
+
+    labeler = WeakLabeler(**labeler_args)
+    if labeler.gazetteers.version != gazetteer_version:
+        raise RuntimeError(
+            f"Gazetteer data changed under the run: worker loaded version "
+            f"{labeler.gazetteers.version}, parent has {gazetteer_version}"
+        )
+    labeler.get_matcher(language)  # compile the patterns before the first chunk
+    _worker_labeler = labeler
+
+
+def _label_chunk(start, texts, language):
+    return start, [_worker_labeler.label_text(t, language) for t in texts]
+
+
+# ===============================
+# DRIVER
+# ===============================
+
+def label_many(labeler, texts, workers=None, chunksize=64, language="auto",
+               text_key="text", max_pending=None, mp_context=None):
+    """
+    Yield (index, entities) for every text, in input order.
+
+    workers:     process count (None → os.cpu_count(); 0/1 → run in-process)
+    chunksize:   texts sent to a worker per task
+    max_pending: chunks in flight at once (default 2 × workers)
+    mp_context:  multiprocessing context for the pool (default: the platform's)
+    """
+    source = iter_texts(texts, text_key)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        for index, text in enumerate(source):
+            yield index, labeler.label_text(text, language)
+        return
+
+    if max_pending is None:
+        max_pending = workers * 2
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(labeler.init_args, language, labeler.gazetteers.version),
+    ) as pool:
+        pending = deque()
+        index = 0
+
+        for chunk in _chunks(source, chunksize):
+            pending.append(pool.submit(_label_chunk, index, chunk, language))
+            index += len(chunk)
+
+            # Backpressure: drain the oldest chunk before reading more input
+            if len(pending) >= max_pending:
+                yield from _drain(pending.popleft())
+
+        while pending:
+            yield from _drain(pending.popleft())
+
+
+def _drain(future):
+    start, results = future.result()
+    for offset, entities in enumerate(results):
+        yield start + offset, entities
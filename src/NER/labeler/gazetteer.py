@@ -0,0 +1,256 @@
+# gazetteer.py
+"""
+Indexed gazetteers for closed vocabularies (districts, municipalities, months, gender).
+
+Lookup order for a piece of OCR text:
+1. exact hash lookup on a normalized key (canonical names and aliases)
+2. a known name contained in the text (one Aho-Corasick pass)
+3. edit-distance search in a BK-tree, bounded per vocabulary
+
+Vocabularies load from a versioned JSON data file (data/gazetteer.json).
+"""
+import os
+import json
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from NER.labeler.normalizer import AhoCorasick
+
+DEFAULT_GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "gazetteer.json")
+
+_STRIP = ' :.,;।\n\t'
+
+# Lookups are memoized per gazetteer; OCR output repeats the same strings a lot.
+# The memo is shared by every thread using the labeler, so it is guarded by a lock
+_CACHE_SIZE = 4096
+_INVISIBLE = dict.fromkeys(map(ord, '\u200c\u200d\ufeff'))
+
+
+def normalize_key(text: str) -> str:
+    """Canonical form used for every index key"""
+    text = unicodedata.normalize("NFC", text).translate(_INVISIBLE)
+    return text.strip(_STRIP).casefold()
+
+
+def levenshtein(a: str, b: str) -> int:
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        previous = current
+    return previous[-1]
+
+
+# ===============================
+# BK-TREE
+# ===============================
+
+class BKTree:
+    """Metric tree over Levenshtein distance; prunes with the triangle inequality"""
+
+    def __init__(self, words=()):
+        # node: (word, {distance: child_node})
+        self._root = None
+        self._size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        if self._root is None:
+            self._root = (word, {})
+            self._size = 1
+            return
+        node = self._root
+        while True:
+            d = levenshtein(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (word, {})
+                self._size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int):
+        """Return [(distance, word)] within max_distance, closest first"""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            d = levenshtein(word, node_word)
+            if d <= max_distance:
+                found.append((d, node_word))
+            for dist in range(d - max_distance, d + max_distance + 1):
+                child = children.get(dist)
+                if child is not None:
+                    stack.append(child)
+        found.sort()
+        return found
+
+    def __len__(self):
+        return self._size
+
+
+# ===============================
+# GAZETTEER
+# ===============================
+
+@dataclass
+class GazetteerMatch:
+    canonical: str
+    matched: str
+    distance: int
+    method: str  # "exact" | "contains" | "fuzzy"
+
+
+class Gazetteer:
+    """One closed vocabulary: canonical names plus aliases"""
+
+    def __init__(self, name: str, entries: List[Dict], max_distance: int = 1,
+                 min_contains: int = 3):
+        self.name = name
+        self.max_distance = max_distance
+        self.min_contains = min_contains
+
+        # normalized key -> canonical
+        self._index: Dict[str, str] = {}
+        for entry in entries:
+            canonical = entry["canonical"]
+            for surface in [canonical] + list(entry.get("aliases", [])):
+                key = normalize_key(surface)
+                if key:
+                    self._index.setdefault(key, canonical)
+
+        self._contains = AhoCorasick(k for k in self._index if len(k) >= min_contains)
+        self._tree = BKTree(self._index)
+        self._cache: Dict[tuple, Optional[GazetteerMatch]] = {}
+        self._cache_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled (spawn / forkserver worker start-up); the
+        # memo is per process anyway
+        state = self.__dict__.copy()
+        del state["_cache_lock"]
+        state["_cache"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._cache_lock = threading.Lock()
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_key(text) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def canonical_names(self) -> List[str]:
+        return sorted(set(self._index.values()))
+
+    @property
+    def keys(self) -> List[str]:
+        """Every normalized surface form: canonical names and aliases"""
+        return sorted(self._index)
+
+    def _distance_budget(self, key: str) -> int:
+        # Short words need an exact hit; longer ones tolerate more OCR noise
+        return min(self.max_distance, len(key) // 4)
+
+    def lookup(self, text: str, fuzzy: bool = True) -> Optional[GazetteerMatch]:
+        cache_key = (text, fuzzy)
+        with self._cache_lock:
+            if cache_key in self._cache:
+                return self._cache[cache_key]
+        # Computed outside the lock: a racing thread at worst repeats the work
+        match = self._lookup(text, fuzzy)
+        with self._cache_lock:
+            if len(self._cache) >= _CACHE_SIZE:
+                self._cache.clear()
+            self._cache[cache_key] = match
+        return match
+
+    def _lookup(self, text: str, fuzzy: bool) -> Optional[GazetteerMatch]:
+        key = normalize_key(text)
+        if not key:
+            return None
+
+        canonical = self._index.get(key)
+        if canonical is not None:
+            return GazetteerMatch(canonical, key, 0, "exact")
+
+        # Known name inside a longer OCR string, e.g. "काठमाडौं महानगरपालिका"
+        if len(key) >= self.min_contains:
+            best = None
+            for start, end in self._contains.iter_matches(key):
+                if best is None or end - start > best[1] - best[0]:
+                    best = (start, end)
+            if best is not None:
+                matched = key[best[0]:best[1]]
+                return GazetteerMatch(self._index[matched], matched, 0, "contains")
+
+        # Numbers and punctuation never resolve by edit distance
+        budget = self._distance_budget(key)
+        if fuzzy and budget > 0 and any(c.isalpha() for c in key):
+            hits = self._tree.search(key, budget)
+            if hits:
+                distance, matched = hits[0]
+                return GazetteerMatch(self._index[matched], matched, distance, "fuzzy")
+
+        return None
+
+    def canonical(self, text: str, fuzzy: bool = True) -> Optional[str]:
+        match = self.lookup(text, fuzzy=fuzzy)
+        return match.canonical if match else None
+
+
+class Gazetteers:
+    """All vocabularies from one data file, keyed by vocabulary name"""
+
+    def __init__(self, vocabularies: Dict[str, Gazetteer], version: str = None):
+        self.vocabularies = vocabularies
+        self.version = version
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.vocabularies
+
+    def __getitem__(self, name: str) -> Gazetteer:
+        return self.vocabularies[name]
+
+    def get(self, name: str) -> Optional[Gazetteer]:
+        return self.vocabularies.get(name)
+
+    def lookup(self, name: str, text: str, fuzzy: bool = True) -> Optional[GazetteerMatch]:
+        gazetteer = self.vocabularies.get(name)
+        if gazetteer is None:
+            return None
+        return gazetteer.lookup(text, fuzzy=fuzzy)
+
+
+def load_gazetteers(path: str = DEFAULT_GAZETTEER_PATH) -> Gazetteers:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    vocabularies = {}
+    for name, spec in data["vocabularies"].items():
+        vocabularies[name] = Gazetteer(
+            name,
+            spec["entries"],
+            max_distance=spec.get("max_distance", 1),
+            min_contains=spec.get("min_contains", 3),
+        )
+    return Gazetteers(vocabularies, version=data.get("version"))
@@ -0,0 +1,103 @@
+# intervals.py
+"""
+Overlap resolution by weighted interval scheduling.
+
+Given [start, end) spans with weights, pick the non-overlapping subset with
+the largest total weight. Spans are sorted once and split into clusters of
+transitively overlapping spans; isolated spans are kept as-is and each
+cluster is solved by dynamic programming over end-sorted spans, with a
+binary search for the last compatible span. O(n log n) overall.
+"""
+from bisect import bisect_right
+from typing import Callable, List, Sequence, Tuple
+
+
+def _clusters(spans: Sequence[Tuple[int, int]]):
+    """Yield lists of indices whose spans overlap transitively, in start order"""
+    order = sorted(range(len(spans)), key=spans.__getitem__)
+    cluster = []
+    cluster_end = None
+    for i in order:
+        start, end = spans[i]
+        if cluster and start >= cluster_end:
+            yield cluster
+            cluster = []
+        if not cluster:
+            cluster_end = end
+        elif end > cluster_end:
+            cluster_end = end
+        cluster.append(i)
+    if cluster:
+        yield cluster
+
+
+def _schedule(spans, weights, members: List[int]) -> List[int]:
+    """Maximum-weight non-overlapping subset of one cluster"""
+    # Members arrive in start order, so a stable sort on the end alone
+    # gives (end, start) order
+    order = sorted(members, key=lambda i: spans[i][1])
+    ends = [spans[i][1] for i in order]
+    n = len(order)
+
+    # prev[k]: number of sorted spans that end at or before span k starts
+    prev = [bisect_right(ends, spans[i][0], 0, k) for k, i in enumerate(order)]
+    w = [weights[i] for i in order]
+
+    best = [0] * (n + 1)
+    for k in range(n):
+        take = w[k] + best[prev[k]]
+        best[k + 1] = take if take > best[k] else best[k]
+
+    # Walk back through the table
+    chosen = []
+    k = n
+    while k > 0:
+        if w[k - 1] + best[prev[k - 1]] > best[k - 1]:
+            chosen.append(order[k - 1])
+            k = prev[k - 1]
+        else:
+            k -= 1
+    return chosen
+
+
+def select_intervals(spans: Sequence[Tuple[int, int]],
+                     weigh: Callable[[List[int]], List[int]]) -> List[int]:
+    """
+    spans: (start, end) pairs
+    weigh: given a cluster's indices, returns their weights (same order)
+    Returns indices of the chosen spans, ordered by start.
+    """
+    chosen = []
+    for members in _clusters(spans):
+        if len(members) == 1:
+            chosen.append(members[0])
+            continue
+        weights = dict(zip(members, weigh(members)))
+        chosen.extend(_schedule(spans, weights, members))
+
+    chosen.sort(key=spans.__getitem__)
+    return chosen
+
+
+def lexicographic_weights(priorities: Sequence[int], lengths: Sequence[int]) -> List[int]:
+    """
+    Integer weights under which one span of a higher priority outweighs any
+    number of lower-priority spans, and among equal selections the shorter
+    (more specific) texts win.
+    """
+    n = len(priorities)
+    if n == 0:
+        return []
+    # Packing: weight = base**rank * length_scale - length. With base = n + 1,
+    # one span of rank r + 1 is worth base**(r+1) * length_scale, more than
+    # all n spans of rank r together; every length sum is below length_scale,
+    # so lengths only break ties between equal priority counts, and the DP
+    # adds and compares plain ints.
+    base = n + 1
+    length_scale = sum(lengths) + 1
+    # Exponents are ranks of the priorities present, keeping the numbers small
+    rank = {p: r for r, p in enumerate(sorted(set(priorities)), 1)}
+    return [
+        (base ** rank[p]) * length_scale - length
+        for p, length in zip(priorities, lengths)
+    ]
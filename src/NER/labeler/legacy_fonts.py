@@ -0,0 +1,227 @@
+# legacy_fonts.py
+"""
+Legacy Nepali font (Preeti, Kantipur, PCS NEPALI, ...) to Unicode conversion.
+
+Fonts/map.json gives, per font, a character map and regex pre/post rules.
+Each font is compiled once into:
+- a str.translate table (single-character keys)
+- a longest-match regex for multi-character keys, if any
+- precompiled pre-rules and post-rules
+
+Large inputs are converted in chunks cut at line/whitespace boundaries.
+"""
+import os
+import re
+import json
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MAP_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "Fonts", "map.json"
+)
+DEFAULT_FONT = "Preeti"
+
+# Chunk size for large strings and file streams
+CHUNK_SIZE = 1 << 16
+
+
+# ===============================
+# COMPILED FONT
+# ===============================
+
+def _compile_rules(rules) -> List[Tuple[re.Pattern, str]]:
+    return [(re.compile(pattern), replacement) for pattern, replacement in rules]
+
+
+class LegacyFontConverter:
+    """One font's rules, compiled once"""
+
+    def __init__(self, name: str, spec: Dict):
+        self.name = name
+        self.version = spec.get("version")
+
+        rules = spec["rules"]
+        char_map = rules.get("character-map", {})
+
+        single = {k: v for k, v in char_map.items() if len(k) == 1}
+        multi = {k: v for k, v in char_map.items() if len(k) > 1}
+
+        self._table = str.maketrans(single)
+
+        # Multi-character keys: longest first so the alternation is longest-match
+        self._multi = multi
+        self._multi_re = None
+        if multi:
+            keys = sorted(multi, key=len, reverse=True)
+            self._multi_re = re.compile("|".join(map(re.escape, keys)))
+
+        self._pre_rules = _compile_rules(rules.get("pre-rules", []))
+        self._post_rules = _compile_rules(rules.get("post-rules", []))
+
+    def _convert_chunk(self, text: str) -> str:
+        for pattern, replacement in self._pre_rules:
+            text = pattern.sub(replacement, text)
+
+        if self._multi_re is not None:
+            # Multi-char keys first, so their characters are not translated singly
+            parts = []
+            last = 0
+            for m in self._multi_re.finditer(text):
+                parts.append(text[last:m.start()].translate(self._table))
+                parts.append(self._multi[m.group(0)])
+                last = m.end()
+            parts.append(text[last:].translate(self._table))
+            text = "".join(parts)
+        else:
+            text = text.translate(self._table)
+
+        for pattern, replacement in self._post_rules:
+            text = pattern.sub(replacement, text)
+        return text
+
+    def convert(self, text: str, chunk_size: int = CHUNK_SIZE) -> str:
+        if len(text) <= chunk_size:
+            return self._convert_chunk(text)
+        return "".join(self._convert_chunk(c) for c in _split_chunks(text, chunk_size))
+
+    def convert_stream(self, src, dst, chunk_size: int = CHUNK_SIZE):
+        """Convert a text file object `src` into `dst`, one chunk at a time"""
+        carry = ""
+        while True:
+            block = src.read(chunk_size)
+            if not block:
+                break
+            data = carry + block
+            cut = _boundary(data)
+            if cut <= 0:
+                carry = data
+                continue
+            dst.write(self._convert_chunk(data[:cut]))
+            carry = data[cut:]
+        if carry:
+            dst.write(self._convert_chunk(carry))
+
+
+def _boundary(text: str) -> int:
+    """
+    Last safe cut point: before the final newline, else before the final
+    whitespace. Rules work within words, and the chunk that follows starts
+    with whitespace so a '^' rule cannot fire mid-text.
+    """
+    cut = text.rfind("\n")
+    if cut <= 0:
+        cut = max(text.rfind(" "), text.rfind("\t"))
+    return cut
+
+
+def _split_chunks(text: str, chunk_size: int):
+    start = 0
+    n = len(text)
+    while start < n:
+        end = min(start + chunk_size, n)
+        if end < n:
+            cut = _boundary(text[start:end])
+            if cut > 0:
+                end = start + cut
+        yield text[start:end]
+        start = end
+
+
+# ===============================
+# LOADING
+# ===============================
+
+_converters: Dict[str, Dict[str, LegacyFontConverter]] = {}
+
+
+def load_converters(path: str = DEFAULT_MAP_PATH) -> Dict[str, LegacyFontConverter]:
+    """All fonts from a map file, compiled once per process"""
+    path = os.path.abspath(path)
+    if path not in _converters:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        _converters[path] = {name: LegacyFontConverter(name, spec) for name, spec in data.items()}
+    return _converters[path]
+
+
+def get_converter(font: str = DEFAULT_FONT, path: str = DEFAULT_MAP_PATH) -> LegacyFontConverter:
+    converters = load_converters(path)
+    if font not in converters:
+        raise ValueError(f"Unknown legacy font '{font}'. Available: {list(converters)}")
+    return converters[font]
+
+
+def convert(text: str, font: str = DEFAULT_FONT) -> str:
+    return get_converter(font).convert(text)
+
+
+# ===============================
+# DETECTION
+# ===============================
+
+DEFAULT_WORDLIST_PATH = os.path.join(os.path.dirname(__file__), "data", "english_words.txt")
+
+# Legacy-encoded Nepali is ASCII where vowel signs land on letters and
+# punctuation inside words: नेपाल → g]kfn, सरकार → ;/sf/, नाम → gfd.
+# Only sequences Preeti produces all the time and English words almost
+# never do count; a single slash or apostrophe (Date/Place, Father's) does not.
+_LEGACY_SIGNS = re.compile(
+    r"[A-Za-z][\]}\[]"           # े / ै / ृ after a letter: g]kfn, gf]
+    r"|[bcdghjkmnpqstvwxyz;/:]f"  # ा after a consonant: sf (का), gf (ना), ;f (सा), /f (रा)
+)
+_TOKEN = re.compile(r"\S*[A-Za-z]\S*")
+_LETTERS = re.compile(r"[A-Za-z]+")
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+
+# Share of tokens that are not English and carry a Preeti sequence above
+# which text is treated as legacy-encoded
+LEGACY_THRESHOLD = 0.5
+
+_wordlists: Dict[str, frozenset] = {}
+
+
+def load_wordlist(path: str = DEFAULT_WORDLIST_PATH) -> frozenset:
+    """Lower-case English words, one per line ('#' comments), loaded once per process"""
+    path = os.path.abspath(path)
+    if path not in _wordlists:
+        with open(path, "r", encoding="utf-8") as f:
+            _wordlists[path] = frozenset(
+                line.strip().lower() for line in f if line.strip() and not line.startswith("#")
+            )
+    return _wordlists[path]
+
+
+def _is_english(token: str, words: frozenset) -> bool:
+    """Every letter run of two or more is a known word: Date/Place, Father's, No."""
+    runs = [r for r in _LETTERS.findall(token) if len(r) > 1]
+    return bool(runs) and all(r.lower() in words for r in runs)
+
+
+def legacy_score(text: str, sample_size: int = 2000) -> float:
+    """
+    Share of ASCII tokens that look legacy-encoded: not an English word and
+    containing a Preeti sequence. 0 when the sample has any Devanagari
+    (real Unicode text) or when most tokens are English words.
+    """
+    sample = text[:sample_size]
+    if _DEVANAGARI.search(sample):
+        return 0.0
+    tokens = _TOKEN.findall(sample)
+    if not tokens:
+        return 0.0
+    words = load_wordlist()
+    unknown = [t for t in tokens if not _is_english(t, words)]
+    if len(unknown) * 2 <= len(tokens):
+        return 0.0
+    return sum(1 for t in unknown if _LEGACY_SIGNS.search(t)) / len(tokens)
+
+
+def detect_legacy(text: str, threshold: float = LEGACY_THRESHOLD,
+                  default_font: str = DEFAULT_FONT) -> Optional[str]:
+    """
+    Return the font to convert with when the text looks legacy-encoded,
+    else None. The supported fonts share most of their layout, so the
+    default font is used for detected text.
+    """
+    if legacy_score(text) >= threshold:
+        return default_font
+    return None
@@ -0,0 +1,154 @@
+# matcher.py
+"""
+Precompiled pattern engine for WeakLabeler.
+
+Each language profile gets its own PatternMatcher, built once:
+- every regex is compiled a single time
+- the language filter is resolved up front
+- patterns that start with a fixed literal are grouped by that literal,
+  and the whole group is skipped when the literal is not in the text
+"""
+import re
+from typing import Dict, List, Tuple
+
+# Characters that end a literal run at the start of a pattern
+_META = set('.^$*+?{}[]()|\\')
+
+# Escapes that stand for a plain character
+_ESCAPED_LITERALS = set('.^$*+?{}[]()|\\-:/ ')
+
+# Quantifiers that make the previous character optional
+_OPTIONAL_QUANTIFIERS = ('?', '*', '{')
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """True if '|' appears outside any group (conservative)"""
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def literal_prefix(pattern: str) -> str:
+    """
+    Return the fixed text every match of `pattern` must start with.
+
+    Only plain characters and escaped punctuation are collected; the scan
+    stops at the first class, group, escape sequence or quantifier.
+    Returns "" when no safe prefix exists.
+    """
+    if _has_top_level_alternation(pattern):
+        return ""
+
+    chars = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            if i + 1 < len(pattern) and pattern[i + 1] in _ESCAPED_LITERALS:
+                chars.append(pattern[i + 1])
+                i += 2
+                continue
+            break
+        if c in _META:
+            # A quantifier applies to the last collected character
+            if c in _OPTIONAL_QUANTIFIERS and chars:
+                chars.pop()
+            break
+        chars.append(c)
+        i += 1
+
+    return "".join(chars)
+
+
+def labels_for_language(labels, language: str) -> List[str]:
+    """Apply the WeakLabeler language filter once for a profile"""
+    selected = []
+    for label in labels:
+        if language == "ne" and label.endswith("_EN"):
+            continue
+        if language == "en" and not label.endswith("_EN"):
+            # DATE works for both
+            if label not in ['DATE']:
+                continue
+        selected.append(label)
+    return selected
+
+
+class PatternMatcher:
+    """Compiled, language-filtered view of WeakLabeler.patterns"""
+
+    def __init__(self, patterns: Dict[str, List[str]], language: str, flags=re.IGNORECASE):
+        self.language = language
+
+        # Ordered (label, compiled, anchor_index) - order matters for dedup ties
+        self._compiled: List[Tuple[str, re.Pattern, int]] = []
+
+        # Anchor checks, one per distinct literal prefix
+        self._anchors: List[Tuple[str, object]] = []
+        anchor_ids: Dict[str, int] = {}
+
+        for label in labels_for_language(patterns.keys(), language):
+            for pattern in patterns[label]:
+                try:
+                    compiled = re.compile(pattern, flags)
+                except re.error:
+                    continue
+
+                anchor = literal_prefix(pattern)
+                anchor_id = -1
+                if anchor:
+                    if anchor not in anchor_ids:
+                        anchor_ids[anchor] = len(self._anchors)
+                        self._anchors.append(self._build_anchor(anchor, flags))
+                    anchor_id = anchor_ids[anchor]
+
+                self._compiled.append((label, compiled, anchor_id))
+
+    @staticmethod
+    def _build_anchor(anchor: str, flags):
+        # Uncased text (Devanagari, digits, punctuation) can use a plain
+        # substring test; cased text keeps the exact regex folding rules
+        if not (flags & re.IGNORECASE) or anchor.lower() == anchor.upper():
+            return (anchor, None)
+        return (anchor, re.compile(re.escape(anchor), flags))
+
+    def _present_anchors(self, text: str) -> List[bool]:
+        present = []
+        for literal, compiled in self._anchors:
+            if compiled is None:
+                present.append(literal in text)
+            else:
+                present.append(compiled.search(text) is not None)
+        return present
+
+    def iter_matches(self, text: str):
+        """
+        Yield (label, match_iterator) in the original pattern order,
+        skipping patterns whose literal prefix is absent from `text`.
+        """
+        present = self._present_anchors(text)
+        for label, compiled, anchor_id in self._compiled:
+            if anchor_id >= 0 and not present[anchor_id]:
+                continue
+            yield label, compiled.finditer(text)
+
+    def __len__(self):
+        return len(self._compiled)
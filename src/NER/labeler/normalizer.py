@@ -0,0 +1,272 @@
+# normalizer.py
+"""
+Offset-preserving OCR text normalization.
+
+Runs, in order:
+1. Unicode NFC (per whitespace-delimited segment)
+2. OCR corrections in a single Aho-Corasick pass (leftmost-longest)
+3. Optional Devanagari <-> ASCII digit folding
+
+Every stage records where each output character came from, so spans
+found in the normalized text map back to the raw OCR text exactly.
+"""
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+DEVANAGARI_DIGITS = "०१२३४५६७८९"
+ASCII_DIGITS = "0123456789"
+
+_TO_ASCII = str.maketrans(DEVANAGARI_DIGITS, ASCII_DIGITS)
+_TO_DEVANAGARI = str.maketrans(ASCII_DIGITS, DEVANAGARI_DIGITS)
+
+_DIGIT_FOLDS = {
+    None: None,
+    "ascii": _TO_ASCII,
+    "devanagari": _TO_DEVANAGARI,
+}
+
+# NFC never composes across whitespace, so segments can be normalized alone
+_SEGMENT = re.compile(r'\s*\S+|\s+')
+
+
+# ===============================
+# OFFSET MAP
+# ===============================
+
+@dataclass
+class NormalizedText:
+    """Normalized text plus its mapping back to the raw input"""
+    text: str
+    raw: str
+    # starts[i]: raw index of the segment that produced text[i] (len+1 entries)
+    starts: List[int]
+    # ends[i]: raw index just past the segment that produced text[i-1] (len+1 entries)
+    ends: List[int]
+
+    def to_raw(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a [start, end) span in `text` to the raw text"""
+        if end <= start:
+            pos = self.starts[start]
+            return pos, pos
+        return self.starts[start], self.ends[end]
+
+
+def _identity(text: str) -> NormalizedText:
+    positions = list(range(len(text) + 1))
+    return NormalizedText(text, text, positions, positions[:])
+
+
+class _Builder:
+    """Accumulates output pieces and their source spans"""
+
+    def __init__(self, source_len: int):
+        self.pieces: List[str] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = [0]
+        self.source_len = source_len
+
+    def copy(self, text: str, pos: int):
+        """Unchanged run: positions map one to one"""
+        self.pieces.append(text)
+        self.starts.extend(range(pos, pos + len(text)))
+        self.ends.extend(range(pos + 1, pos + len(text) + 1))
+
+    def replace(self, text: str, src_start: int, src_end: int):
+        """Rewritten run: every output char maps to the whole source span"""
+        self.pieces.append(text)
+        self.starts.extend([src_start] * len(text))
+        self.ends.extend([src_end] * len(text))
+
+    def build(self) -> Tuple[str, List[int], List[int]]:
+        self.starts.append(self.source_len)
+        return "".join(self.pieces), self.starts, self.ends
+
+
+def _compose(outer: List[int], inner: List[int]) -> List[int]:
+    """Map positions through two stages: inner stage → outer stage"""
+    return [outer[i] for i in inner]
+
+
+# ===============================
+# AHO-CORASICK
+# ===============================
+
+class AhoCorasick:
+    """Multi-pattern matcher; one pass over the text regardless of pattern count"""
+
+    def __init__(self, patterns):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Length of the longest pattern ending at each state (0 = none)
+        self._out: List[int] = [0]
+        # Nearest state on the fail chain that ends a pattern
+        self._dict_link: List[int] = [0]
+
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+        # From the root state, jump straight to the next possible first char
+        first = "".join(self._goto[0])
+        self._first = re.compile("[" + re.escape(first) + "]") if first else None
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+                self._dict_link.append(0)
+            state = nxt
+        self._out[state] = max(self._out[state], len(pattern))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                fail = self._fail[nxt]
+                self._dict_link[nxt] = fail if self._out[fail] else self._dict_link[fail]
+
+    def iter_matches(self, text: str):
+        """Yield (start, end) for every pattern occurrence"""
+        if self._first is None:
+            return
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        search = self._first.search
+        state = 0
+        i = 0
+        n = len(text)
+        while i < n:
+            if not state:
+                m = search(text, i)
+                if m is None:
+                    return
+                i = m.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            i += 1
+
+            s = state if out[state] else dict_link[state]
+            while s:
+                yield i - out[s], i
+                s = dict_link[s]
+
+    def longest_at(self, text: str) -> List[int]:
+        """Length of the longest match starting at each position"""
+        best = [0] * len(text)
+        for start, end in self.iter_matches(text):
+            if end - start > best[start]:
+                best[start] = end - start
+        return best
+
+
+# ===============================
+# NORMALIZER
+# ===============================
+
+class TextNormalizer:
+    """NFC + OCR corrections + digit folding, with an exact offset map"""
+
+    def __init__(self, corrections: Dict[str, str], nfc: bool = True,
+                 fold_digits: Optional[str] = None):
+        if fold_digits not in _DIGIT_FOLDS:
+            raise ValueError(f"fold_digits must be one of {list(_DIGIT_FOLDS)}")
+
+        self.nfc = nfc
+        self.fold_digits = fold_digits
+        self.corrections = {
+            self._nfc(wrong): self._nfc(correct)
+            for wrong, correct in corrections.items() if wrong
+        }
+        self._automaton = AhoCorasick(self.corrections)
+
+    def _nfc(self, text: str) -> str:
+        return unicodedata.normalize("NFC", text) if self.nfc else text
+
+    def normalize(self, text: str) -> NormalizedText:
+        result = _identity(text)
+
+        if self.nfc and not unicodedata.is_normalized("NFC", text):
+            result = self._apply(result, self._nfc_stage)
+
+        if self.corrections:
+            result = self._apply(result, self._correction_stage)
+
+        table = _DIGIT_FOLDS[self.fold_digits]
+        if table is not None:
+            # One char in, one char out: offsets are unchanged
+            result.text = result.text.translate(table)
+
+        return result
+
+    @staticmethod
+    def _apply(result: NormalizedText, stage) -> NormalizedText:
+        staged = stage(result.text)
+        if staged is None:
+            # Stage changed nothing
+            return result
+        text, starts, ends = staged
+        if result.text is result.raw:
+            # Previous stages were identity: no composition needed
+            return NormalizedText(text, result.raw, starts, ends)
+        return NormalizedText(
+            text=text,
+            raw=result.raw,
+            starts=_compose(result.starts, starts),
+            ends=_compose(result.ends, ends),
+        )
+
+    def _nfc_stage(self, text: str):
+        # Only called when the text is not already NFC
+        builder = _Builder(len(text))
+        for m in _SEGMENT.finditer(text):
+            segment = m.group(0)
+            normalized = unicodedata.normalize("NFC", segment)
+            if normalized == segment:
+                builder.copy(segment, m.start())
+            else:
+                builder.replace(normalized, m.start(), m.end())
+        return builder.build()
+
+    def _correction_stage(self, text: str):
+        best = self._automaton.longest_at(text)
+        if not any(best):
+            return None
+
+        builder = _Builder(len(text))
+
+        i = 0
+        run_start = 0
+        n = len(text)
+        while i < n:
+            length = best[i]
+            if length:
+                if run_start < i:
+                    builder.copy(text[run_start:i], run_start)
+                wrong = text[i:i + length]
+                builder.replace(self.corrections[wrong], i, i + length)
+                i += length
+                run_start = i
+            else:
+                i += 1
+        if run_start < n:
+            builder.copy(text[run_start:n], run_start)
+
+        return builder.build()
@@ -1,21 +1,60 @@
 # weak_labeler.py
 import re
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass
 from collections import defaultdict
 
+from NER.labeler.matcher import PatternMatcher
+from NER.labeler import bulk
+from NER.labeler.normalizer import TextNormalizer, NormalizedText
+from NER.labeler.gazetteer import Gazetteers, load_gazetteers, DEFAULT_GAZETTEER_PATH
+from NER.labeler.intervals import select_intervals, lexicographic_weights
+from NER.labeler import legacy_fonts
+
+# Validation patterns, compiled once
+_CITIZENSHIP_SHAPE = re.compile(r'[\d०-९].*?[\-\s].*?[\d०-९].*?[\-\s].*?[\d०-९]')
+_YEAR_EN = re.compile(r'\b(19|20)\d{2}\b')
+_DAY_EN = re.compile(r'\b([1-9]|[12][0-9]|3[01])\b')
+_NEPALI_DIGITS = re.compile(r'[०१२३४५६७८९]+')
+_ALL_DIGITS = re.compile(r'^\d+$')
+
+# Overlap resolution priority (higher wins)
+LABEL_PRIORITY = {
+    'CITIZENSHIP_NUMBER': 10,
+    'CITIZENSHIP_NUMBER_EN': 10,
+    'NAME': 9,
+    'NAME_EN': 9,
+    'GENDER': 8,
+    'GENDER_EN': 8,
+    'DATE': 7,
+    'DATE_EN': 7,
+    'DISTRICT': 6,
+    'WARD': 5,
+    'MUNICIPALITY': 4,
+}
+
+# Language detection character classes
+_NEPALI_CHARS = re.compile('[' + re.escape('अआइईउऊऋएऐओऔकखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसहािीुूृेैोौंःँ') + ']')
+_ENGLISH_CHARS = re.compile(r'[A-Za-z]')
+
 @dataclass
 class Entity:
     text: str
     label: str
     start: int
     end: int
+    canonical: Optional[str] = None
 
 class WeakLabeler:
     """Weak labeling system for Nepali/English documents - COMPLETE VERSION"""
     
-    def __init__(self):
+    def __init__(self, fold_digits: str = None, gazetteer_path: str = DEFAULT_GAZETTEER_PATH,
+                 legacy_font: str = None):
+        # What bulk workers rebuild their own labeler from
+        self.init_args = {"fold_digits": fold_digits, "gazetteer_path": gazetteer_path,
+                          "legacy_font": legacy_font}
+
         # Regex patterns for different entities
         self.patterns = {
             # Citizenship numbers: Handle OCR errors like ? and mixed numbers
@@ -130,19 +169,18 @@ class WeakLabeler:
             ],
         }
         
-        # Gazetteers for common values
-        self.gazetteers = {
-            'GENDER': ['पुरुष', 'महिला', 'पुंष', 'स्त्री', 'अन्य', 'निङ्ग'],
-            'GENDER_EN': ['Male', 'Female', 'Other', 'N.', 'M.', 'F.', 'N'],
-            'MONTH_EN': ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 
-                        'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC', 'APRIL', 'OCTOBER', '99'],
-            'DISTRICT': [
-                'काभ्रेपलाञ्चोक', 'काठमाडौं', 'म्याग्दी', 'सप्तरी', 
-                'उदयपुर', 'सिन्धुपाल्चोक', 'ललितपुर', 'मकवानपुर',
-                'मोरङ', 'गुल्मी', 'बागलुङ', 'कास्की', 'पर्सा',
-                'सर्लाही', 'गाःदि', 'बागलुड', 'सिन्धुपाल्चोक', 'गुल्मी',
-                'सप्तरी', 'उदयपुर', 'बागलुङ', 'ललितपुर', 'मकवानपुर'
-            ],
+        # Gazetteers for common values (versioned data file, indexed for lookup)
+        self.gazetteers: Gazetteers = load_gazetteers(gazetteer_path)
+        
+        # Which gazetteer gives the canonical value for each label
+        self.canonical_vocab = {
+            'DISTRICT': 'DISTRICT',
+            'MUNICIPALITY': 'MUNICIPALITY',
+            'MUNICIPALITY_EN': 'MUNICIPALITY',
+            'GENDER': 'GENDER',
+            'GENDER_EN': 'GENDER_EN',
+            'DATE': 'MONTH',
+            'DATE_EN': 'MONTH_EN',
         }
         
         # Common OCR error mappings for cleaning
@@ -157,57 +195,73 @@ class WeakLabeler:
             'गाःवि': 'गा.वि.स.',
             'गाःपि': 'गा.वि.स.',
         }
+
+        # Legacy font input (Preeti, Kantipur, ...): None | "auto" | font name
+        self.legacy_font = legacy_font
+        if legacy_font not in (None, "auto"):
+            legacy_fonts.get_converter(legacy_font)  # fail early on unknown fonts
+        
+        # Single-pass NFC + corrections + digit folding, with offset map
+        # fold_digits: None | "ascii" | "devanagari"
+        self.normalizer = TextNormalizer(self.ocr_corrections, fold_digits=fold_digits)
+
+        # Compiled matchers, built lazily once per language profile
+        self._matchers: Dict[str, PatternMatcher] = {}
+
+    def get_matcher(self, language: str) -> PatternMatcher:
+        """Return the compiled matcher for a language profile ("ne", "en", "auto")"""
+        profile = language if language in ("ne", "en") else "auto"
+        matcher = self._matchers.get(profile)
+        if matcher is None:
+            matcher = PatternMatcher(self.patterns, profile)
+            self._matchers[profile] = matcher
+        return matcher
     
     def label_text(self, text: str, language: str = "auto") -> List[Entity]:
         """Label entities in text using weak supervision"""
         entities = []
         
+        # Legacy-font text is converted first; spans then refer to the Unicode text
+        text = self._convert_legacy(text)
+        
         # Auto-detect language
         if language == "auto":
             language = self._detect_language(text)
         
-        # Clean text slightly for better matching (but keep original for positions)
-        cleaned_text = self._clean_ocr_text(text)
+        # Clean text for better matching; the offset map keeps original positions
+        normalized = self._normalize(text)
+        cleaned_text = normalized.text
         
-        # Find entities using regex patterns
-        for label, patterns in self.patterns.items():
-            # Skip patterns for wrong language
-            if language == "ne" and label.endswith("_EN"):
-                continue
-            if language == "en" and not label.endswith("_EN"):
-                # But keep base labels (like DATE) for English too
-                if label not in ['DATE']:  # DATE works for both
-                    continue
-            
-            for pattern in patterns:
-                try:
-                    for match in re.finditer(pattern, cleaned_text, re.IGNORECASE):
-                        # Extract the actual entity text
-                        if match.groups():
-                            entity_text = match.group(1)
-                        else:
-                            entity_text = match.group(0)
+        # Find entities using the precompiled patterns for this language
+        for label, matches in self.get_matcher(language).iter_matches(cleaned_text):
+            try:
+                for match in matches:
+                    # Extract the actual entity text
+                    if match.groups():
+                        entity_text = match.group(1)
+                    else:
+                        entity_text = match.group(0)
+                    
+                    if entity_text:
+                        # Clean the text
+                        entity_text = entity_text.strip(' :.,;।\n\t')
                         
-                        if entity_text:
-                            # Clean the text
-                            entity_text = entity_text.strip(' :.,;।\n\t')
+                        # Skip if too short or invalid
+                        if len(entity_text) < 2:
+                            continue
                             
-                            # Skip if too short or invalid
-                            if len(entity_text) < 2:
-                                continue
-                                
-                            # Validate against gazetteers if applicable
-                            if self._is_valid_entity(label, entity_text, language):
-                                # Map position back to original text
-                                # For simplicity, use same positions (should be close)
-                                entities.append(Entity(
-                                    text=entity_text,
-                                    label=label,
-                                    start=match.start(),
-                                    end=match.end()
-                                ))
-                except Exception as e:
-                    continue
+                        # Validate against gazetteers if applicable
+                        if self._is_valid_entity(label, entity_text, language):
+                            # Map position back to original text
+                            start, end = normalized.to_raw(match.start(), match.end())
+                            entities.append(Entity(
+                                text=entity_text,
+                                label=label,
+                                start=start,
+                                end=end
+                            ))
+            except Exception as e:
+                continue
         
         # Remove overlapping entities and clean up
         deduplicated = self._deduplicate_entities(entities)
@@ -217,12 +271,42 @@ class WeakLabeler:
         
         return final_entities
     
+    def label_many(self, texts, workers=None, chunksize=64, language: str = "auto",
+                   text_key: str = "text", mp_context=None):
+        """
+        Label many texts across a process pool, yielding (index, entities) in input order.
+
+        `texts` may be a list, any iterator, or a path to a JSONL file
+        (one record per line, text under `text_key`). Workers build their
+        own labeler from this one's constructor arguments.
+        """
+        return bulk.label_many(
+            self, texts,
+            workers=workers,
+            chunksize=chunksize,
+            language=language,
+            text_key=text_key,
+            mp_context=mp_context,
+        )
+    
+    def _convert_legacy(self, text: str) -> str:
+        """Convert legacy-font encoded text to Unicode when enabled"""
+        if self.legacy_font is None:
+            return text
+        font = self.legacy_font
+        if font == "auto":
+            font = legacy_fonts.detect_legacy(text)
+            if font is None:
+                return text
+        return legacy_fonts.get_converter(font).convert(text)
+    
+    def _normalize(self, text: str) -> NormalizedText:
+        """Normalize OCR text, keeping a map back to the raw offsets"""
+        return self.normalizer.normalize(text)
+    
     def _clean_ocr_text(self, text: str) -> str:
         """Clean common OCR errors to improve pattern matching"""
-        cleaned = text
-        for wrong, correct in self.ocr_corrections.items():
-            cleaned = cleaned.replace(wrong, correct)
-        return cleaned
+        return self._normalize(text).text
     
     def _post_process_entities(self, entities: List[Entity], language: str) -> List[Entity]:
         """Fix common entity extraction issues"""
@@ -274,6 +358,12 @@ class WeakLabeler:
                 # Keep other entities as-is
                 result.append(entity)
         
+        # Attach canonical gazetteer values
+        for entity in result:
+            vocab = self.canonical_vocab.get(entity.label)
+            if vocab:
+                entity.canonical = self.gazetteers[vocab].canonical(entity.text)
+        
         return result
     
     def _is_valid_entity(self, label: str, text: str, language: str) -> bool:
@@ -285,23 +375,16 @@ class WeakLabeler:
         # Clean the text for validation
         clean_text = text.strip(' :.,;।')
         
-        # Check gazetteers
+        # Check gazetteers (exact or contained name; fuzzy matching is
+        # left to the canonical lookup in _post_process_entities)
         if label in self.gazetteers:
-            text_upper = clean_text.upper()
-            for valid in self.gazetteers[label]:
-                if valid.upper() == text_upper or text_upper == valid.upper():
-                    return True
-                # Check for partial matches for districts
-                if label == 'DISTRICT' and len(clean_text) >= 3:
-                    # If text is part of a known district
-                    for district in self.gazetteers['DISTRICT']:
-                        if clean_text in district or district in clean_text:
-                            return True
+            if self.gazetteers.lookup(label, clean_text, fuzzy=False) is not None:
+                return True
         
         # Citizenship number validation
         if 'CITIZENSHIP' in label:
             # Check if it looks like a citizenship number
-            if re.search(r'[\d०-९].*?[\-\s].*?[\d०-९].*?[\-\s].*?[\d०-९]', clean_text):
+            if _CITIZENSHIP_SHAPE.search(clean_text):
                 return True
             # Also accept if it has numbers and dashes
             if any(c in '0123456789०१२३४५६७८९-' for c in clean_text):
@@ -311,18 +394,18 @@ class WeakLabeler:
         if 'DATE' in label:
             if language == "en":
                 # Check for year
-                if re.search(r'\b(19|20)\d{2}\b', clean_text):
+                if _YEAR_EN.search(clean_text):
                     return True
                 # Check for month name
                 if any(month in clean_text.upper() for month in ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 
                                                                'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']):
                     return True
                 # Check for day (1-31)
-                if re.search(r'\b([1-9]|[12][0-9]|3[01])\b', clean_text):
+                if _DAY_EN.search(clean_text):
                     return True
             else:
                 # Nepali date has Devanagari numbers
-                if re.search(r'[०१२३४५६७८९]+', clean_text):
+                if _NEPALI_DIGITS.search(clean_text):
                     return True
         
         # Name validation
@@ -332,7 +415,7 @@ class WeakLabeler:
             if any(word in clean_text for word in invalid_words):
                 return False
             # Should have at least 2 characters and not be a number
-            if len(clean_text) >= 2 and not re.search(r'^\d+$', clean_text):
+            if len(clean_text) >= 2 and not _ALL_DIGITS.search(clean_text):
                 return True
         
         # District/Municipality - accept if reasonable length
@@ -352,75 +435,33 @@ class WeakLabeler:
     
     def _detect_language(self, text: str) -> str:
         """Simple language detection"""
-        nepali_chars = set('अआइईउऊऋएऐओऔकखगघङचछजझञटठडढणतथदधनपफबभमयरलवशषसहािीुूृेैोौंःँ')
-        
         # Take first 500 chars for efficiency
         sample = text[:500]
         
-        has_nepali = any(char in nepali_chars for char in sample)
-        has_english = any('A' <= char <= 'Z' or 'a' <= char <= 'z' for char in sample)
+        # Vectorised counts via precompiled character classes
+        nepali_count = len(_NEPALI_CHARS.findall(sample))
+        english_count = len(_ENGLISH_CHARS.findall(sample))
         
-        if has_nepali and not has_english:
+        if nepali_count > english_count:
             return "ne"
-        elif has_english and not has_nepali:
-            return "en"
         else:
-            # Count characters
-            nepali_count = sum(1 for char in sample if char in nepali_chars)
-            english_count = sum(1 for char in sample if 'A' <= char <= 'Z' or 'a' <= char <= 'z')
-            
-            if nepali_count > english_count:
-                return "ne"
-            else:
-                return "en"
+            return "en"
     
     def _deduplicate_entities(self, entities: List[Entity]) -> List[Entity]:
-        """Remove overlapping entities, keep the most specific"""
+        """Remove overlapping entities, keep the highest-priority, most specific set"""
         if not entities:
             return []
         
-        # Sort by start position
-        entities.sort(key=lambda x: x.start)
+        priorities = [LABEL_PRIORITY.get(e.label, 0) for e in entities]
         
-        filtered = []
-        for entity in entities:
-            if not filtered:
-                filtered.append(entity)
-            else:
-                last = filtered[-1]
-                # Check for overlap
-                overlap = entity.start < last.end
-                
-                if not overlap:
-                    filtered.append(entity)
-                else:
-                    # Choose based on priority
-                    priority = {
-                        'CITIZENSHIP_NUMBER': 10,
-                        'CITIZENSHIP_NUMBER_EN': 10,
-                        'NAME': 9,
-                        'NAME_EN': 9,
-                        'GENDER': 8,
-                        'GENDER_EN': 8,
-                        'DATE': 7,
-                        'DATE_EN': 7,
-                        'DISTRICT': 6,
-                        'WARD': 5,
-                        'MUNICIPALITY': 4,
-                    }
-                    
-                    entity_priority = priority.get(entity.label, 0)
-                    last_priority = priority.get(last.label, 0)
-                    
-                    if entity_priority > last_priority:
-                        filtered[-1] = entity
-                    elif entity_priority == last_priority:
-                        # Keep shorter (more specific) entity
-                        if len(entity.text) < len(last.text):
-                            filtered[-1] = entity
-                    # else keep the last one
+        def weigh(members):
+            return lexicographic_weights(
+                [priorities[i] for i in members],
+                [len(entities[i].text) for i in members],
+            )
         
-        return filtered
+        chosen = select_intervals([(e.start, e.end) for e in entities], weigh)
+        return [entities[i] for i in chosen]
 
 def visualize_entities(text: str, entities: List[Entity]):
     """Create a visualization of entities in text"""
@@ -1,8 +1,14 @@
+import os
 import cv2
-import tempfile
-from language_detector import detect_language_from_regions  # NEW IMPORT
-from OCR.Main_ocr import preprocess
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from language_detector import detect_language_from_regions, classify_script, document_language
+from OCR.Main_ocr import preprocess, to_doctr_page as _to_doctr_page, doctr_text as _doctr_text
+from OCR.Main_ocr import PREPROCESS_VERSION, profile_for_language, segment_lines
+from OCR.ocr_cache import OCRCache, crop_key
 from NER.labeler.weak_labeler import WeakLabeler
+import metrics
 
 # ===============================
 # GLOBAL SINGLETONS (IMPORTANT)
@@ -11,35 +17,117 @@ from NER.labeler.weak_labeler import WeakLabeler
 _easy_reader = None
 _doctr_model = None
 _labeler = None
+_ocr_cache = None
+
+# Lazy loading is guarded by one lock; each model has its own inference
+# lock so concurrent regions never call the same model at the same time
+_load_lock = threading.Lock()
+_easy_lock = threading.Lock()
+_doctr_lock = threading.Lock()
+
+# Dynamic int8 quantization of the recognition networks, per engine.
+# EasyOCR already quantizes on CPU unless asked not to (Reader(quantize=...)),
+# so its default stays on; DocTR is opt-in.
+QUANTIZE = {
+    "doctr": os.environ.get("OCR_QUANTIZE_DOCTR", "0") == "1",
+    "easyocr": os.environ.get("OCR_QUANTIZE_EASYOCR", "1") == "1",
+}
+
+# Recognition-only OCR: the YOLO text blocks are cut into lines (words for
+# DocTR) by projection profiles and only the engines' recognition networks
+# run, skipping EasyOCR's CRAFT and DocTR's detection model
+RECOGNITION_ONLY = os.environ.get("OCR_RECOGNITION_ONLY", "0") == "1"
+
+
+class _RecoveredText(str):
+    """
+    Text read on an error path (primary engine raised, a fallback read it).
+    It is returned like any text but never cached, so the next run tries
+    the primary engine again. A crop no engine could read has text None.
+    """
 
 
 # ===============================
 # LOADERS
 # ===============================
 
+def _quantize_dynamic(module):
+    """int8 weights for the LSTM/Linear layers of a recognition network"""
+    import torch
+    return torch.quantization.quantize_dynamic(
+        module, {torch.nn.LSTM, torch.nn.GRU, torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
 def _load_easyocr():
     global _easy_reader
     if _easy_reader is None:
-        import easyocr
-        _easy_reader = easyocr.Reader(["ne", "en"], gpu=False)
+        with _load_lock:
+            if _easy_reader is None:
+                import easyocr
+                with metrics.current().stage("load_easyocr"):
+                    _easy_reader = easyocr.Reader(
+                        ["ne", "en"], gpu=False, quantize=QUANTIZE["easyocr"]
+                    )
     return _easy_reader
 
 
 def _load_doctr():
     global _doctr_model
     if _doctr_model is None:
-        from doctr.models import ocr_predictor
-        _doctr_model = ocr_predictor(pretrained=True)
+        with _load_lock:
+            if _doctr_model is None:
+                from doctr.models import ocr_predictor
+                with metrics.current().stage("load_doctr"):
+                    model = ocr_predictor(pretrained=True)
+                    if QUANTIZE["doctr"]:
+                        reco = model.reco_predictor
+                        reco.model = _quantize_dynamic(reco.model.eval())
+                _doctr_model = model
     return _doctr_model
 
 
+def set_quantization(doctr=None, easyocr=None):
+    """
+    Switch engines between fp32 and int8 recognition (None = leave as is).
+    A loaded engine whose setting changes is reloaded on next use.
+    """
+    global _easy_reader, _doctr_model
+    with _load_lock:
+        if doctr is not None and doctr != QUANTIZE["doctr"]:
+            QUANTIZE["doctr"] = doctr
+            _doctr_model = None
+        if easyocr is not None and easyocr != QUANTIZE["easyocr"]:
+            QUANTIZE["easyocr"] = easyocr
+            _easy_reader = None
+
+
+def set_recognition_only(enabled):
+    """Switch between full engine pipelines and recognition on segmented lines"""
+    global RECOGNITION_ONLY
+    RECOGNITION_ONLY = bool(enabled)
+
+
 def _load_labeler():
     global _labeler
     if _labeler is None:
-        _labeler = WeakLabeler()
+        with _load_lock:
+            if _labeler is None:
+                with metrics.current().stage("load_labeler"):
+                    _labeler = WeakLabeler()
     return _labeler
 
 
+def _load_cache():
+    """OCR result cache; persisted when OCR_CACHE_PATH is set"""
+    global _ocr_cache
+    if _ocr_cache is None:
+        with _load_lock:
+            if _ocr_cache is None:
+                _ocr_cache = OCRCache(path=os.environ.get("OCR_CACHE_PATH"))
+    return _ocr_cache
+
+
 # ===============================
 # OCR ROUTERS
 # ===============================
@@ -48,71 +136,365 @@ def _ocr_english(processed_img):
     """
     English → DocTR (primary) with EasyOCR fallback
     """
+    failed = False
     try:
-        from doctr.io import DocumentFile
-
-        model = _load_doctr()
-
-        with tempfile.NamedTemporaryFile(
-            suffix=".jpg", delete=False
-        ) as tmp:
-            cv2.imwrite(tmp.name, processed_img)
-            doc = DocumentFile.from_images(tmp.name)
-
-        result = model(doc)
+        if RECOGNITION_ONLY:
+            text = _doctr_recognize([processed_img])[0]
+        else:
+            model = _load_doctr()
 
-        texts = []
-        for page in result.pages:
-            for block in page.blocks:
-                for line in block.lines:
-                    words = [
-                        w.value for w in line.words
-                        if w.confidence > 0.3
-                    ]
-                    if words:
-                        texts.append(" ".join(words))
+            # In-memory page straight to the predictor
+            page = _to_doctr_page(processed_img)
+            with _doctr_lock, metrics.current().stage("doctr"):
+                result = model([page])
 
-        text = " ".join(texts).strip()
+            text = " ".join(
+                t for t in (_doctr_text(page) for page in result.pages) if t
+            )
 
         if text:
             return text, "doctr"
 
     except Exception:
-        pass
+        metrics.current().count("doctr_errors")
+        failed = True
 
     # ---- fallback ----
-    reader = _load_easyocr()
-    text = " ".join(reader.readtext(processed_img, detail=0)).strip()
+    metrics.current().count("easyocr_fallbacks")
+    text = _easyocr_single(processed_img)
+    if failed:
+        text = _RecoveredText(text)
     return text, "easyocr_fallback"
 
 
 def _ocr_nepali(processed_img):
+    return _easyocr_single(processed_img), "easyocr"
+
+
+def _easyocr_single(img):
+    if RECOGNITION_ONLY:
+        return _easyocr_recognize([img])[0]
     reader = _load_easyocr()
-    text = " ".join(reader.readtext(processed_img, detail=0)).strip()
-    return text, "easyocr"
+    with _easy_lock, metrics.current().stage("easyocr"):
+        lines = reader.readtext(img, detail=0)
+    return " ".join(lines).strip()
+
+
+# ===============================
+# RECOGNITION-ONLY OCR
+# ===============================
+
+def _easyocr_recognize(images):
+    """
+    EasyOCR's recognizer on projection-profile line boxes, no CRAFT
+    detection; readtext for a crop whose recognize() call fails.
+    """
+    reader = _load_easyocr()
+    texts = []
+    for img in images:
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        with metrics.current().stage("segment"):
+            boxes = segment_lines(gray)
+        try:
+            with _easy_lock, metrics.current().stage("easyocr_recognize"):
+                lines = reader.recognize(
+                    gray,
+                    horizontal_list=[[x1, x2, y1, y2] for x1, y1, x2, y2 in boxes],
+                    free_list=[],
+                    detail=0,
+                    batch_size=len(boxes),
+                )
+            texts.append(" ".join(lines).strip())
+        except Exception:
+            metrics.current().count("easyocr_recognize_errors")
+            with _easy_lock, metrics.current().stage("easyocr"):
+                lines = reader.readtext(img, detail=0)
+            texts.append(_RecoveredText(" ".join(lines).strip()))
+    return texts
+
+
+def _doctr_recognize(images):
+    """
+    DocTR's recognition network alone on projection-profile word boxes of
+    every crop, in one call; words under the usual 0.3 confidence are dropped.
+    """
+    model = _load_doctr()
+    words, owners = [], []
+    for i, img in enumerate(images):
+        page = _to_doctr_page(img)
+        with metrics.current().stage("segment"):
+            boxes = segment_lines(img, words=True)
+        for x1, y1, x2, y2 in boxes:
+            words.append(page[y1:y2, x1:x2])
+            owners.append(i)
+
+    predictions = []
+    if words:
+        with _doctr_lock, metrics.current().stage("doctr_recognize"):
+            predictions = model.reco_predictor(words)
+
+    texts = [[] for _ in images]
+    for i, (value, confidence) in zip(owners, predictions):
+        if value and confidence > 0.3:
+            texts[i].append(value)
+    return [" ".join(t) for t in texts]
+
+
+# ===============================
+# BATCHED OCR ROUTERS
+# ===============================
+
+def _pad_to(img, height, width):
+    """Pad a crop bottom/right to (height, width) with its background level"""
+    h, w = img.shape[:2]
+    if h == height and w == width:
+        return img
+    background = int(np.median(img))
+    return cv2.copyMakeBorder(
+        img, 0, height - h, 0, width - w,
+        cv2.BORDER_CONSTANT, value=(background,) * 3
+    )
+
+
+def _easyocr_batch(images):
+    """
+    One EasyOCR readtext_batched call for all crops (padded to a common
+    size, as the batched detector needs); per-crop readtext on failure.
+    """
+    if RECOGNITION_ONLY:
+        return _easyocr_recognize(images)
+
+    reader = _load_easyocr()
+
+    if len(images) > 1:
+        try:
+            height = max(img.shape[0] for img in images)
+            width = max(img.shape[1] for img in images)
+            padded = [_pad_to(img, height, width) for img in images]
+            with _easy_lock, metrics.current().stage("easyocr"):
+                results = reader.readtext_batched(padded, detail=0)
+            return [" ".join(r).strip() for r in results]
+        except Exception:
+            metrics.current().count("easyocr_batch_errors")
+
+    texts = []
+    for img in images:
+        try:
+            with _easy_lock, metrics.current().stage("easyocr"):
+                lines = reader.readtext(img, detail=0)
+            texts.append(" ".join(lines).strip())
+        except Exception:
+            metrics.current().count("easyocr_errors")
+            texts.append(None)
+    return texts
+
+
+def _ocr_english_batch(images):
+    """
+    All regions through DocTR as one multi-page document; regions with no
+    DocTR text fall back to EasyOCR, a failed batch falls back per region.
+    """
+    if not images:
+        return []
+
+    try:
+        if RECOGNITION_ONLY:
+            results = [(text, "doctr") for text in _doctr_recognize(images)]
+        else:
+            model = _load_doctr()
+            pages = [_to_doctr_page(img) for img in images]
+            with _doctr_lock, metrics.current().stage("doctr"):
+                doc = model(pages)
+            results = [(_doctr_text(page), "doctr") for page in doc.pages]
+    except Exception:
+        # Batch failed: route each region on its own
+        metrics.current().count("doctr_batch_errors")
+        return [_ocr_english(img) for img in images]
+
+    # ---- fallback ----
+    missing = [i for i, (text, _) in enumerate(results) if not text]
+    if missing:
+        metrics.current().count("easyocr_fallbacks", len(missing))
+        texts = _easyocr_batch([images[i] for i in missing])
+        for i, text in zip(missing, texts):
+            results[i] = (text, "easyocr_fallback")
+
+    return results
+
+
+def _ocr_nepali_batch(images):
+    if not images:
+        return []
+    return [(text, "easyocr") for text in _easyocr_batch(images)]
 
 
 # ===============================
 # MAIN PIPELINE ENTRY
 # ===============================
 
-def process_image(image, detections, language="auto"):
+def _ocr_region(processed, language):
+    """Single-region routing"""
+    if language == "en":
+        return _ocr_english(processed)
+
+    if language == "ne":
+        return _ocr_nepali(processed)
+
+    # Fallback: try English first, fallback Nepali
+    text, engine = _ocr_english(processed)
+    if not text:
+        metrics.current().count("nepali_retries")
+        text, engine = _ocr_nepali(processed)
+    return text, engine
+
+
+def _ocr_regions_batched(regions, language):
+    """All regions of a document in one engine call; results keep region order"""
+    if language == "en":
+        return _ocr_english_batch(regions)
+
+    if language == "ne":
+        return _ocr_nepali_batch(regions)
+
+    # Fallback: English batch first, Nepali batch for regions still empty
+    results = _ocr_english_batch(regions)
+    missing = [i for i, (text, _) in enumerate(results) if not text]
+    metrics.current().count("nepali_retries", len(missing))
+    for i, result in zip(missing, _ocr_nepali_batch([regions[i] for i in missing])):
+        if result[0]:
+            results[i] = result
+    return results
+
+
+def _preprocess_and_ocr(crop, language):
+    with metrics.current().stage("preprocess"):
+        processed = preprocess(crop, profile_for_language(language))
+    return _ocr_region(processed, language)
+
+
+def _ocr_regions_concurrent(crops, language, workers):
+    """
+    Bounded thread pool over regions: preprocessing of one region overlaps
+    OCR of another (OpenCV and torch release the GIL); model locks keep
+    each engine to one call at a time. Results keep region order.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # bind(): worker threads record into this call's trace
+        task = metrics.bind(lambda crop: _preprocess_and_ocr(crop, language))
+        return list(pool.map(task, crops))
+
+
+def _ocr_crops(crops, language, batch, workers):
+    if workers > 1 and len(crops) > 1:
+        return _ocr_regions_concurrent(crops, language, workers)
+    if batch:
+        profile = profile_for_language(language)
+        with metrics.current().stage("preprocess"):
+            processed = [preprocess(c, profile) for c in crops]
+        return _ocr_regions_batched(processed, language)
+    return [_preprocess_and_ocr(c, language) for c in crops]
+
+
+# ===============================
+# REGION PREFILTER
+# ===============================
+
+# Crops failing any check are skipped before OCR:
+#   min_height/min_width: px
+#   min_std:  grayscale standard deviation (blank or overexposed crops are flat)
+#   ink_delta: how far from the crop mean a pixel must be to count as ink, on
+#             either side, so light text on a dark band counts as well
+#   min_ink:  fraction of ink pixels
+PREFILTER_THRESHOLDS = {
+    "min_height": 8,
+    "min_width": 16,
+    "min_std": 6.0,
+    "ink_delta": 40,
+    "min_ink": 0.003,
+}
+
+# Statistics are taken on a strided view of at most about this many pixels
+_PREFILTER_PIXELS = 1 << 16
+
+
+def region_skip_reason(crop, thresholds=None):
+    """Why a crop is not worth OCR ("too_small" | "low_contrast" | "low_ink"), or None"""
+    t = PREFILTER_THRESHOLDS if thresholds is None else {**PREFILTER_THRESHOLDS, **thresholds}
+
+    h, w = crop.shape[:2]
+    if h < t["min_height"] or w < t["min_width"]:
+        return "too_small"
+
+    step = max(1, int((h * w / _PREFILTER_PIXELS) ** 0.5))
+    sample = crop[::step, ::step]
+    if sample.ndim == 3:
+        sample = cv2.cvtColor(np.ascontiguousarray(sample), cv2.COLOR_BGR2GRAY)
+
+    mean, std = cv2.meanStdDev(sample)
+    mean, std = float(mean[0][0]), float(std[0][0])
+    if std < t["min_std"]:
+        return "low_contrast"
+
+    ink = np.count_nonzero(np.abs(sample.astype(np.int16) - mean) > t["ink_delta"]) / sample.size
+    if ink < t["min_ink"]:
+        return "low_ink"
+
+    return None
+
+
+def process_image(image, detections, language="auto", batch=True, workers=1,
+                  use_cache=True, prefilter=True, prefilter_thresholds=None,
+                  with_metrics=False):
     """
     image: full cv2 image
     detections: YOLO detections
-    language: "auto" | "en" | "ne"
+    language: "auto" | "en" | "ne" | "script"; "auto" picks the document
+        language from the layout (photo / fingerprint regions). "script"
+        (opt-in until SCRIPT_WEIGHTS are fitted on labeled crops) classifies
+        each text region as Devanagari or Latin and sends it to that
+        script's engine only; the document's "detected_language" is then the
+        area-weighted vote, with its "language_confidence" (None in the
+        other modes, or when no region had readable letters and the layout
+        decided)
+    batch: OCR all text regions of the document in one engine call
+    workers: >1 runs regions concurrently on a thread pool (instead of batching)
+    use_cache: reuse OCR text for crops already seen (NER always reruns)
+    prefilter: skip tiny, blank and low-ink crops before OCR; they are listed
+        in "skipped_regions" with their reason
+    prefilter_thresholds: overrides for PREFILTER_THRESHOLDS
+    with_metrics: add a "metrics" field (stage wall/CPU times and counters);
+        totals are always kept in metrics.REGISTRY
     """
+    return process_images(
+        [image], [detections], language=language, batch=batch, workers=workers,
+        use_cache=use_cache, prefilter=prefilter,
+        prefilter_thresholds=prefilter_thresholds, with_metrics=with_metrics,
+    )[0]
 
-    labeler = _load_labeler()
 
-    collected_text = []
-    engines_used = set()
-    
-    # NEW: Auto-detect language from regions if "auto"
-    if language == "auto":
-        language = detect_language_from_regions(detections, default="en")
-        print(f"Auto-detected language: {'English' if language == 'en' else 'Nepali'}")
+def process_images(images, detections_list, language="auto", batch=True, workers=1,
+                   use_cache=True, prefilter=True, prefilter_thresholds=None,
+                   with_metrics=False):
+    """
+    Several documents at once: the text regions of all documents that share
+    a language go through one batched OCR call. Same options and per-document
+    output as process_image; "metrics", if requested, covers the whole call.
+    """
+    with metrics.tracing() as trace:
+        outputs = _process_images(images, detections_list, language, batch, workers,
+                                  use_cache, prefilter, prefilter_thresholds)
+    metrics.REGISTRY.observe(trace, documents=len(outputs))
+
+    if with_metrics:
+        snapshot = trace.as_dict()
+        for output in outputs:
+            output["metrics"] = snapshot
+    return outputs
 
+
+def _collect_crops(image, detections, prefilter, prefilter_thresholds):
+    crops = []
+    skipped = []
     for det in detections:
         if det.get("class") != "text_block_primary":
             continue
@@ -123,36 +505,137 @@ def process_image(image, detections, language="auto"):
         if crop.size == 0:
             continue
 
-        processed = preprocess(crop)
-
-        # -----------------------
-        # LANGUAGE ROUTING
-        # -----------------------
-        if language == "en":
-            text, engine = _ocr_english(processed)
+        if prefilter:
+            reason = region_skip_reason(crop, prefilter_thresholds)
+            if reason:
+                skipped.append({"bbox": det["bbox"], "reason": reason})
+                continue
 
-        elif language == "ne":
-            text, engine = _ocr_nepali(processed)
+        crops.append(crop)
+    return crops, skipped
 
-        else:
-            # Fallback: try English first, fallback Nepali
-            text, engine = _ocr_english(processed)
-            if not text:
-                text, engine = _ocr_nepali(processed)
 
-        if text:
-            collected_text.append(text)
-            engines_used.add(engine)
+def _process_images(images, detections_list, language, batch, workers,
+                    use_cache, prefilter, prefilter_thresholds):
+    trace = metrics.current()
 
-    full_text = " ".join(collected_text).strip()
+    labeler = _load_labeler()
 
-    entities = []
-    if full_text:
-        entities = labeler.label_text(full_text)
+    with trace.stage("crop"):
+        collected = [
+            _collect_crops(image, detections, prefilter, prefilter_thresholds)
+            for image, detections in zip(images, detections_list)
+        ]
+
+    n_crops = sum(len(crops) for crops, _ in collected)
+    n_skipped = sum(len(skipped) for _, skipped in collected)
+    trace.count("regions", n_crops + n_skipped)
+    trace.count("regions_skipped", n_skipped)
+
+    # -----------------------
+    # LANGUAGE (per region in script mode)
+    # -----------------------
+    languages = []
+    confidences = []
+    region_languages = []
+    for d, (crops, _) in enumerate(collected):
+        if language != "script":
+            doc_language = language
+            if doc_language == "auto":
+                doc_language = detect_language_from_regions(detections_list[d], default="en")
+                print(f"Auto-detected language: {'English' if doc_language == 'en' else 'Nepali'}")
+            languages.append(doc_language)
+            confidences.append(None)
+            region_languages.append([doc_language] * len(crops))
+            continue
 
-    return {
-        "text": full_text,
-        "entities": entities,
-        "ocr_engines_used": list(engines_used),
-        "detected_language": language  # NEW: Return detected language
-    }
\ No newline at end of file
+        with trace.stage("classify"):
+            scripts = [classify_script(c) for c in crops]
+        votes = [(c.shape[0] * c.shape[1], s[1]) for c, s in zip(crops, scripts) if s]
+        # Layout heuristic only when no region has readable letters
+        fallback = detect_language_from_regions(detections_list[d], default="en") if not votes else None
+        doc_language, confidence = document_language(votes, default=fallback)
+        # Regions without letters follow the document
+        routed = [s[0] if s else doc_language for s in scripts]
+        trace.count("regions_script_ne", routed.count("ne"))
+        trace.count("regions_script_en", routed.count("en"))
+
+        languages.append(doc_language)
+        confidences.append(confidence)
+        region_languages.append(routed)
+        source = f"{confidence:.2f}" if confidence is not None else "from layout"
+        print(f"Script-detected language: {'English' if doc_language == 'en' else 'Nepali'} ({source})")
+
+    # -----------------------
+    # OCR CACHE
+    # -----------------------
+    results = [[None] * len(crops) for crops, _ in collected]
+    keys = None
+    cache = _load_cache() if use_cache else None
+    if cache is not None:
+        with trace.stage("cache"):
+            keys = []
+            # fp32 and int8 engines (and recognition-only mode) may read a
+            # crop differently
+            mode = f"int8={QUANTIZE['doctr']:d}{QUANTIZE['easyocr']:d}"
+            if RECOGNITION_ONLY:
+                mode += ":reco"
+            for d, (crops, _) in enumerate(collected):
+                keys.append([
+                    crop_key(c, f"region:{lang}:{mode}", PREPROCESS_VERSION)
+                    for c, lang in zip(crops, region_languages[d])
+                ])
+                results[d] = [cache.get(k) for k in keys[d]]
+
+    # -----------------------
+    # LANGUAGE ROUTING (misses only, one call per language)
+    # -----------------------
+    pending = {}
+    for d, doc_results in enumerate(results):
+        for i, result in enumerate(doc_results):
+            if result is None:
+                pending.setdefault(region_languages[d][i], []).append((d, i))
+
+    n_pending = sum(len(refs) for refs in pending.values())
+    if cache is not None:
+        trace.count("cache_hits", n_crops - n_pending)
+        trace.count("cache_misses", n_pending)
+    trace.count("regions_ocr", n_pending)
+
+    if pending:
+        with trace.stage("ocr"):
+            for doc_language, refs in pending.items():
+                regions = [collected[d][0][i] for d, i in refs]
+                fresh = _ocr_crops(regions, doc_language, batch, workers)
+                for (d, i), result in zip(refs, fresh):
+                    results[d][i] = result
+                    # Failed and error-path reads are not cached
+                    text = result[0]
+                    if cache is not None and text is not None and not isinstance(text, _RecoveredText):
+                        cache.put(keys[d][i], *result)
+
+    outputs = []
+    for d, doc_results in enumerate(results):
+        collected_text = []
+        engines_used = set()
+        for text, engine in doc_results:
+            if text:
+                collected_text.append(text)
+                engines_used.add(engine)
+
+        full_text = " ".join(collected_text).strip()
+
+        entities = []
+        if full_text:
+            with trace.stage("ner"):
+                entities = labeler.label_text(full_text)
+
+        outputs.append({
+            "text": full_text,
+            "entities": entities,
+            "ocr_engines_used": list(engines_used),
+            "detected_language": languages[d],  # NEW: Return detected language
+            "language_confidence": confidences[d],
+            "skipped_regions": collected[d][1],
+        })
+    return outputs
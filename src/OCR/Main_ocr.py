@@ -2,7 +2,13 @@ import os
 import cv2
 import json
 import re
+import time
+import hashlib
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from language_detector import get_language_from_folder  # NEW IMPORT
+from OCR.ocr_cache import OCRCache, crop_key
 
 # ===============================
 # CONFIG
@@ -11,6 +17,14 @@ from language_detector import get_language_from_folder  # NEW IMPORT
 CROPS_ROOT_DIR = "citizenship/cropped_regions"
 OUTPUT_PATH = "Result/test_results.json"
 
+# Incremental runs: one JSONL record per finished folder, plus the input
+# fingerprint of every folder already in it
+RESULTS_JSONL = "Result/test_results.jsonl"
+MANIFEST_PATH = "Result/manifest.json"
+
+# Persistent OCR cache (SQLite); None keeps the cache in memory only
+OCR_CACHE_PATH = os.environ.get("OCR_CACHE_PATH")
+
 
 # ===============================
 # SHARED UTILS (SAFE TO IMPORT)
@@ -20,10 +34,201 @@ def get_base(folder):
     return re.sub(r'_(front|back|side)$', '', folder, re.IGNORECASE)
 
 
-def preprocess(img):
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blurred = cv2.GaussianBlur(gray, (0, 0), 3)
-    return cv2.addWeighted(gray, 1.5, blurred, -0.5, 0)
+# ===============================
+# PREPROCESSING
+# ===============================
+
+# Bump whenever preprocess() output changes, so cached OCR text is not reused
+PREPROCESS_VERSION = "2"
+
+# Per-engine profiles:
+#   grayscale:   one channel out (EasyOCR greys internally; DocTR wants RGB)
+#   sharpen:     unsharp-mask sigma, 0 = off (DocTR normalizes contrast itself)
+#   text_height: target median text-line height in px, None = keep scale
+#   max_side:    cap on the longest side, None = no cap
+# "full" is the original behaviour: grayscale + sharpen at full resolution.
+PREPROCESS_PROFILES = {
+    "full": {"grayscale": True, "sharpen": 3.0, "text_height": None, "max_side": None},
+    # Recognition crops are resized to 32px high by DocTR
+    "doctr": {"grayscale": False, "sharpen": 0, "text_height": 32, "max_side": 2048},
+    # EasyOCR recognizes at 64px; CRAFT detection does best around 30-50px text
+    "easyocr": {"grayscale": True, "sharpen": 3.0, "text_height": 40, "max_side": 2560},
+}
+
+# Bounds on the resize factor, and changes too small to be worth a resize
+SCALE_RANGE = (0.25, 2.0)
+MIN_SCALE_CHANGE = 0.1
+
+
+def profile_for_language(lang):
+    """English goes to DocTR, everything else to EasyOCR"""
+    return "doctr" if lang == "en" else "easyocr"
+
+
+class _Scratch(threading.local):
+    """Per-thread scratch buffers, grown as needed and reused across calls"""
+
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        need = int(np.prod(shape))
+        flat = self.buffers.get(name)
+        if flat is None or flat.size < need or flat.dtype != dtype:
+            flat = self.buffers[name] = np.empty(need, dtype)
+        return flat[:need].reshape(shape)
+
+
+_scratch = _Scratch()
+
+
+def estimate_text_height(img, probe_side=512):
+    """
+    Median text-line height in px from the horizontal ink profile of an
+    Otsu-binarized, downsampled copy. None when no lines are found.
+    """
+    h, w = img.shape[:2]
+    factor = min(1.0, probe_side / max(h, w))
+    small = img
+    if factor < 1.0:
+        small = cv2.resize(img, (max(1, int(w * factor)), max(1, int(h * factor))),
+                           interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    _, ink = cv2.threshold(small, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    rows = np.concatenate(([0], (ink.mean(axis=1) > 0.01).view(np.int8), [0]))
+    edges = np.diff(rows)
+    heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    heights = heights[heights >= 2]
+    if not heights.size:
+        return None
+    return float(np.median(heights)) / factor
+
+
+def _target_scale(img, profile):
+    scale = 1.0
+    if profile["text_height"]:
+        height = estimate_text_height(img)
+        if height:
+            scale = profile["text_height"] / height
+    low, high = SCALE_RANGE
+    scale = min(max(scale, low), high)
+    if profile["max_side"]:
+        scale = min(scale, profile["max_side"] / max(img.shape[:2]))
+    if abs(scale - 1.0) < MIN_SCALE_CHANGE:
+        return 1.0
+    return scale
+
+
+def preprocess(img, engine="full"):
+    """
+    Prepare a crop for one OCR engine (see PREPROCESS_PROFILES): optional
+    grayscale, resize to the engine's text scale, optional unsharp mask.
+    Intermediates live in reused scratch buffers; the result is always a
+    fresh array the caller may keep.
+    """
+    profile = PREPROCESS_PROFILES[engine]
+
+    if profile["grayscale"] and img.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        img = cv2.cvtColor(img, code, dst=_scratch.get("gray", img.shape[:2]))
+
+    # Resize first so the sharpening runs on the smaller image
+    scale = _target_scale(img, profile)
+    if scale != 1.0:
+        h, w = img.shape[:2]
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+        img = cv2.resize(img, size, dst=_scratch.get("resized", (size[1], size[0]) + img.shape[2:]),
+                         interpolation=interpolation)
+
+    if profile["sharpen"]:
+        blurred = cv2.GaussianBlur(img, (0, 0), profile["sharpen"],
+                                   dst=_scratch.get("blurred", img.shape))
+        return cv2.addWeighted(img, 1.5, blurred, -0.5, 0)
+
+    # Still the caller's array (often a view into the full page) or a
+    # scratch buffer: hand back a copy either way
+    return img.copy()
+
+
+# ===============================
+# LINE SEGMENTATION
+# ===============================
+
+# Bands thinner than this share of the median band height are vowel signs
+# above the headline, dots or descenders, not lines of their own
+MIN_LINE_SHARE = 0.4
+# Line boxes grow by this share of their height on every side
+LINE_PAD = 0.15
+# Words (words=True) are split at column gaps wider than this share of the line height
+WORD_GAP = 0.5
+
+
+def _runs(occupied):
+    """[start, end) index pairs of the True runs in a 1-D boolean array"""
+    edges = np.diff(np.concatenate(([0], occupied.view(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def _merge_thin(bands):
+    """Fold thin bands into the nearer neighbouring band"""
+    if len(bands) < 2:
+        return bands
+    typical = float(np.median([e - s for s, e in bands]))
+    bands = [list(b) for b in bands]
+    while len(bands) > 1:
+        thin = [i for i, (s, e) in enumerate(bands) if e - s < MIN_LINE_SHARE * typical]
+        if not thin:
+            break
+        i = thin[0]
+        gap_up = bands[i][0] - bands[i - 1][1] if i > 0 else None
+        gap_down = bands[i + 1][0] - bands[i][1] if i + 1 < len(bands) else None
+        j = i - 1 if gap_down is None or (gap_up is not None and gap_up <= gap_down) else i + 1
+        lo, hi = min(i, j), max(i, j)
+        bands[lo:hi + 1] = [[bands[lo][0], bands[hi][1]]]
+    return [tuple(b) for b in bands]
+
+
+def segment_lines(img, words=False, min_fill=0.01):
+    """
+    Text-line boxes (x1, y1, x2, y2) inside one text block, from the
+    horizontal ink profile of an Otsu-binarized copy, top to bottom. With
+    words, each line is also cut at wide column gaps (left to right).
+    The whole crop when no line is found.
+    """
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    _, ink = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    if ink.mean() > 0.5:
+        ink = 1 - ink  # light text on a dark background
+
+    bands = _merge_thin(_runs(ink.mean(axis=1) > min_fill))
+    boxes = []
+    for top, bottom in bands:
+        line_h = bottom - top
+        pad = max(1, int(round(line_h * LINE_PAD)))
+        y1, y2 = max(0, top - pad), min(h, bottom + pad)
+        columns = ink[top:bottom].any(axis=0)
+        spans = _runs(columns)
+        if not spans:
+            continue
+        if words:
+            # Neighbouring ink spans closer than the word gap belong together
+            merged = [list(spans[0])]
+            for s, e in spans[1:]:
+                if s - merged[-1][1] < WORD_GAP * line_h:
+                    merged[-1][1] = e
+                else:
+                    merged.append([s, e])
+            spans = merged
+        else:
+            spans = [(spans[0][0], spans[-1][1])]
+        for s, e in spans:
+            boxes.append((max(0, int(s) - pad), int(y1), min(w, int(e) + pad), int(y2)))
+
+    return boxes or [(0, 0, w, h)]
 
 
 # REMOVED: Old get_language function - now using imported one
@@ -37,108 +242,34 @@ def build_engine_info(lang, engine):
     }
 
 
-# ===============================
-# BATCH OCR (SCRIPT MODE ONLY)
-# ===============================
-
-def run_batch_ocr(max_folders=40):
-    output = {}
-
-    folders = [
-        f for f in os.listdir(CROPS_ROOT_DIR)
-        if os.path.isdir(os.path.join(CROPS_ROOT_DIR, f))
-    ][:max_folders]
-
-    for folder in folders:
-        path = os.path.join(CROPS_ROOT_DIR, folder)
-        base = get_base(folder)
-
-        # NEW: Use unified language detector
-        lang = get_language_from_folder(path, default="ne")
-        print(f"\n{base}: {'English' if lang == 'en' else 'Nepali'} (detected from regions)")
-
-        output[base] = []
-
-        for img_name in os.listdir(path):
-            if "primary" not in img_name.lower():
-                continue
-            if not img_name.lower().endswith(".png"):
-                continue
-
-            img_path = os.path.join(path, img_name)
-            image = cv2.imread(img_path)
-
-            if image is None:
-                output[base].append({
-                    "file": img_name,
-                    "text": "[Error loading image]",
-                    "engine": None
-                })
-                continue
-
-            processed = preprocess(image)
-
-            # ==========================
-            # ENGLISH → DocTR + fallback
-            # ==========================
-            if lang == "en":
-                try:
-                    from doctr.io import DocumentFile
-                    from doctr.models import ocr_predictor
-                    import tempfile
-
-                    with tempfile.NamedTemporaryFile(
-                        suffix=".jpg", delete=False
-                    ) as tmp:
-                        cv2.imwrite(tmp.name, processed)
-
-                        model = ocr_predictor(pretrained=True)
-                        doc = DocumentFile.from_images(tmp.name)
-                        result = model(doc)
-
-                    texts = []
-                    for page in result.pages:
-                        for block in page.blocks:
-                            for line in block.lines:
-                                words = [
-                                    w.value for w in line.words
-                                    if w.confidence > 0.3
-                                ]
-                                if words:
-                                    texts.append(" ".join(words))
-
-                    text = " ".join(texts).strip()
-                    engine = "doctr"
-
-                except Exception:
-                    import easyocr
-                    reader = easyocr.Reader(["en"], gpu=False)
-                    result = reader.readtext(processed, detail=0)
-                    text = " ".join(result).strip()
-                    engine = "easyocr_fallback"
-
-            # ==========================
-            # NEPALI → EasyOCR
-            # ==========================
-            else:
-                import easyocr
-                reader = easyocr.Reader(["ne", "en"], gpu=False)
-                result = reader.readtext(processed, detail=0)
-                text = " ".join(result).strip()
-                engine = "easyocr"
-
-            output[base].append({
-                "file": img_name,
-                "text": text if text else "[No text]",
-                "engine": build_engine_info(lang, engine)
-            })
-
-            print(f"  {img_name}: {text[:60]}...")
-
-    # ===============================
-    # DOCUMENT-LEVEL SUMMARY
-    # ===============================
-
+def to_doctr_page(img):
+    """
+    DocTR takes HxWx3 uint8 RGB pages. Grayscale crops from preprocess()
+    are expanded in a single cvtColor (no encode/decode, no temp files).
+    """
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2RGB)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2RGB)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def doctr_text(page):
+    """Join confident words of one DocTR page into a line-ordered string"""
+    texts = []
+    for block in page.blocks:
+        for line in block.lines:
+            words = [
+                w.value for w in line.words
+                if w.confidence > 0.3
+            ]
+            if words:
+                texts.append(" ".join(words))
+    return " ".join(texts).strip()
+
+
+def build_summary(output):
+    """Document-level engine summary for the batch JSON"""
     summary = {}
     for doc, pages in output.items():
         engines_used = {
@@ -150,17 +281,309 @@ def run_batch_ocr(max_folders=40):
             "engines_used": list(engines_used),
             "primary_engine": list(engines_used)[0] if engines_used else None
         }
+    return summary
+
+
+# ===============================
+# PER-PROCESS ENGINES
+# ===============================
+
+# Loaded once per process, reused for every image
+_engines = {}
+_cache = None
+
+
+def _get_doctr():
+    if "doctr" not in _engines:
+        from doctr.models import ocr_predictor
+        _engines["doctr"] = ocr_predictor(pretrained=True)
+    return _engines["doctr"]
+
+
+def _get_easyocr(langs):
+    key = "easyocr_" + "_".join(langs)
+    if key not in _engines:
+        import easyocr
+        _engines[key] = easyocr.Reader(list(langs), gpu=False)
+    return _engines[key]
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = OCRCache(path=OCR_CACHE_PATH)
+    return _cache
+
+
+def _init_worker(torch_threads, cache_path=None):
+    """Size intra-op threads so workers x threads fits the cores"""
+    global OCR_CACHE_PATH
+    OCR_CACHE_PATH = cache_path
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    cv2.setNumThreads(1)
+
+
+def ocr_image(processed, lang):
+    """OCR one preprocessed crop; returns (text, engine)"""
+
+    # ==========================
+    # ENGLISH → DocTR + fallback
+    # ==========================
+    if lang == "en":
+        try:
+            model = _get_doctr()
+            result = model([to_doctr_page(processed)])
+            text = " ".join(
+                t for t in (doctr_text(page) for page in result.pages) if t
+            )
+            return text, "doctr"
+
+        except Exception:
+            reader = _get_easyocr(("en",))
+            result = reader.readtext(processed, detail=0)
+            return " ".join(result).strip(), "easyocr_fallback"
+
+    # ==========================
+    # NEPALI → EasyOCR
+    # ==========================
+    reader = _get_easyocr(("ne", "en"))
+    result = reader.readtext(processed, detail=0)
+    return " ".join(result).strip(), "easyocr"
+
+
+def _is_primary(name):
+    name = name.lower()
+    return "primary" in name and name.endswith(".png")
+
+
+def process_folder(folder):
+    """OCR every primary crop in one document folder"""
+    path = os.path.join(CROPS_ROOT_DIR, folder)
+    base = get_base(folder)
+
+    # NEW: Use unified language detector
+    lang = get_language_from_folder(path, default="ne")
+    print(f"\n{base}: {'English' if lang == 'en' else 'Nepali'} (detected from regions)")
+
+    pages = []
+
+    for img_name in os.listdir(path):
+        if not _is_primary(img_name):
+            continue
+
+        img_path = os.path.join(path, img_name)
+        image = cv2.imread(img_path)
+
+        if image is None:
+            pages.append({
+                "file": img_name,
+                "text": "[Error loading image]",
+                "engine": None
+            })
+            continue
+
+        # Same pixels, route and preprocessing → reuse the OCR text
+        cache = _get_cache()
+        key = crop_key(image, f"batch:{lang}", PREPROCESS_VERSION)
+        cached = cache.get(key)
+        if cached is not None:
+            text, engine = cached
+        else:
+            processed = preprocess(image, profile_for_language(lang))
+            text, engine = ocr_image(processed, lang)
+            cache.put(key, text, engine)
+
+        pages.append({
+            "file": img_name,
+            "text": text if text else "[No text]",
+            "engine": build_engine_info(lang, engine)
+        })
+
+        print(f"  {img_name}: {text[:60]}...")
+
+    return base, pages
+
+
+# ===============================
+# INCREMENTAL RESULTS
+# ===============================
+
+def folder_fingerprint(folder, content_hash=False):
+    """
+    What process_folder would read: primary crop names, sizes and mtimes
+    (or their bytes, with content_hash), plus PREPROCESS_VERSION and the
+    language the folder's filenames route it to (a photo or fingerprint
+    crop appearing changes the engines without touching any primary crop).
+    """
+    path = os.path.join(CROPS_ROOT_DIR, folder)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(PREPROCESS_VERSION.encode())
+    h.update(get_language_from_folder(path, default="ne").encode())
+    for name in sorted(n for n in os.listdir(path) if _is_primary(n)):
+        st = os.stat(os.path.join(path, name))
+        h.update(f"\0{name}\0{st.st_size}".encode())
+        if content_hash:
+            with open(os.path.join(path, name), "rb") as f:
+                h.update(f.read())
+        else:
+            h.update(str(st.st_mtime_ns).encode())
+    return h.hexdigest()
+
+
+def load_manifest(path=None):
+    try:
+        with open(path or MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=None):
+    """Atomic: a crash leaves the previous manifest, never a torn one"""
+    path = path or MANIFEST_PATH
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _open_journal(path):
+    """Append handle; a torn last line from a crash is terminated first"""
+    journal = open(path, "a+b")
+    if journal.tell():
+        journal.seek(-1, os.SEEK_END)
+        if journal.read(1) != b"\n":
+            journal.write(b"\n")
+    return journal
+
+
+def read_results(path=None):
+    """Latest record per folder from the JSONL results, in file order"""
+    records = {}
+    try:
+        with open(path or RESULTS_JSONL, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crashed run
+                records.pop(record["folder"], None)
+                records[record["folder"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def compact_results(folders=None, jsonl_path=None, output_path=None):
+    """
+    Rebuild the documents/summary JSON from the JSONL results; `folders`
+    limits (and orders) it to one run's selection.
+    """
+    output_path = output_path or OUTPUT_PATH
+    records = read_results(jsonl_path)
+    if folders is None:
+        folders = sorted(records)
+
+    output = {}
+    for folder in folders:
+        if folder in records:
+            output[records[folder]["base"]] = records[folder]["pages"]
 
     final_output = {
         "documents": output,
-        "summary": summary
+        "summary": build_summary(output)
     }
 
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
         json.dump(final_output, f, indent=2, ensure_ascii=False)
+    return final_output
+
+
+# ===============================
+# BATCH OCR (SCRIPT MODE ONLY)
+# ===============================
+
+def run_batch_ocr(max_folders=40, workers=1, resume=True, content_hash=False):
+    """
+    workers: document folders are spread over this many processes; each
+    loads its engines once and gets cpu_count // workers torch threads.
+
+    Each finished folder is appended to RESULTS_JSONL and its input
+    fingerprint saved to MANIFEST_PATH, so a crashed run loses at most the
+    folder in flight. With resume, folders whose fingerprint is unchanged
+    are skipped; resume=False starts both files over.
+    """
+    folders = [
+        f for f in os.listdir(CROPS_ROOT_DIR)
+        if os.path.isdir(os.path.join(CROPS_ROOT_DIR, f))
+    ][:max_folders]
+
+    os.makedirs(os.path.dirname(RESULTS_JSONL), exist_ok=True)
+    if not resume:
+        for path in (RESULTS_JSONL, MANIFEST_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+
+    manifest = load_manifest()
+    fingerprints = {f: folder_fingerprint(f, content_hash) for f in folders}
+    todo = [f for f in folders if manifest.get(f) != fingerprints[f]]
+    print(f"{len(folders) - len(todo)} folders unchanged, {len(todo)} to process")
+
+    start = time.perf_counter()
+    n_images = 0
+
+    with _open_journal(RESULTS_JSONL) as journal:
+        def record(folder, base, pages):
+            line = json.dumps({
+                "folder": folder,
+                "base": base,
+                "fingerprint": fingerprints[folder],
+                "pages": pages,
+            }, ensure_ascii=False)
+            journal.write(line.encode("utf-8") + b"\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+            manifest[folder] = fingerprints[folder]
+            save_manifest(manifest)
+
+        if workers > 1 and todo:
+            torch_threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(torch_threads, OCR_CACHE_PATH),
+            ) as pool:
+                # Journal folders as they finish, so one slow folder does not
+                # hold back (or, on a crash, lose) the ones done after it
+                futures = {pool.submit(process_folder, folder): folder for folder in todo}
+                for future in as_completed(futures):
+                    base, pages = future.result()
+                    record(futures[future], base, pages)
+                    n_images += len(pages)
+        else:
+            for folder in todo:
+                base, pages = process_folder(folder)
+                record(folder, base, pages)
+                n_images += len(pages)
+
+    elapsed = time.perf_counter() - start
+
+    # ===============================
+    # DOCUMENT-LEVEL SUMMARY
+    # ===============================
+
+    compact_results(folders)
 
     print(f"\nSaved OCR results to {OUTPUT_PATH}")
+    print(f"{n_images} images in {elapsed:.1f}s ({n_images / elapsed if elapsed else 0:.2f} images/sec)")
+    if workers <= 1:
+        stats = _get_cache().stats()
+        print(f"OCR cache: {stats['hits']} hits, {stats['misses']} misses")
 
 
 # ===============================
@@ -168,4 +591,27 @@ def run_batch_ocr(max_folders=40):
 # ===============================
 
 if __name__ == "__main__":
-    run_batch_ocr()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batch OCR over cropped document folders")
+    parser.add_argument("--max-folders", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes to spread document folders over")
+    parser.add_argument("--cache", default=OCR_CACHE_PATH,
+                        help="SQLite file for the persistent OCR cache")
+    parser.add_argument("--fresh", action="store_true",
+                        help="discard earlier results and process every folder")
+    parser.add_argument("--hash", action="store_true",
+                        help="fingerprint crops by content instead of size and mtime")
+    parser.add_argument("--compact", action="store_true",
+                        help="only rebuild the JSON from the JSONL results")
+    args = parser.parse_args()
+
+    OCR_CACHE_PATH = args.cache
+
+    if args.compact:
+        compact_results()
+        print(f"Saved OCR results to {OUTPUT_PATH}")
+    else:
+        run_batch_ocr(max_folders=args.max_folders, workers=args.workers,
+                      resume=not args.fresh, content_hash=args.hash)
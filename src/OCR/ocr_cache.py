@@ -0,0 +1,172 @@
+"""
+ocr_cache.py
+Content-addressed OCR result cache.
+
+Key:   hash of the crop pixels + route (language/engine chain) + preprocessing
+       version + cache schema version
+Tiers: in-memory LRU → optional SQLite file with size-based LRU eviction
+
+Only OCR text is cached; NER always runs fresh on top of it.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_VERSION = "1"
+
+DEFAULT_MEMORY_ITEMS = 2048
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def crop_key(crop, route, preprocess_version):
+    """Stable key for one crop under one OCR route"""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{CACHE_VERSION}|{route}|{preprocess_version}|{crop.shape}|{crop.dtype}|".encode())
+    # Slices of the full image are not contiguous; tobytes() copies in C order
+    h.update(crop.tobytes())
+    return h.hexdigest()
+
+
+class OCRCache:
+    """Two-tier (memory + SQLite) cache of (text, engine) by crop key"""
+
+    def __init__(self, path=None, memory_items=DEFAULT_MEMORY_ITEMS,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._disk_bytes = 0
+        if path:
+            self._open(path)
+
+    # ===============================
+    # SQLITE TIER
+    # ===============================
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_cache ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " engine TEXT,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ocr_cache_lru ON ocr_cache(last_access)")
+        self._db.commit()
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()
+        self._disk_bytes = row[0]
+
+    def _disk_get(self, key):
+        row = self._db.execute(
+            "SELECT text, engine FROM ocr_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._db.execute(
+                "UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+        return row
+
+    def _disk_put(self, key, text, engine):
+        size = len(key) + len(text.encode("utf-8")) + len(engine or "")
+        old = self._db.execute("SELECT size FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        self._db.execute(
+            "INSERT OR REPLACE INTO ocr_cache (key, text, engine, size, last_access)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, text, engine, size, time.time()),
+        )
+        self._disk_bytes += size - (old[0] if old else 0)
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+        self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used rows until the store is 90% of max_bytes"""
+        target = int(self.max_bytes * 0.9)
+        # Other processes may share the file: start from the real total
+        self._disk_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM ocr_cache"
+        ).fetchone()[0]
+        rows = self._db.execute(
+            "SELECT key, size FROM ocr_cache ORDER BY last_access"
+        ).fetchall()
+        doomed = []
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            doomed.append((key,))
+            self._disk_bytes -= size
+        self._db.executemany("DELETE FROM ocr_cache WHERE key = ?", doomed)
+
+    # ===============================
+    # PUBLIC API
+    # ===============================
+
+    def get(self, key):
+        """Return (text, engine) or None"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return value
+
+            if self._db is not None:
+                row = self._disk_get(key)
+                if row is not None:
+                    value = (row[0], row[1])
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key, text, engine):
+        with self._lock:
+            self._remember(key, (text, engine))
+            if self._db is not None:
+                self._disk_put(key, text, engine)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
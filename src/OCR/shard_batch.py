@@ -0,0 +1,373 @@
+"""
+shard_batch.py
+Sharded batch OCR: any number of workers, on one or many machines, share
+the document folders of CROPS_ROOT_DIR through a directory on a shared
+filesystem.
+
+    <work_dir>/leases/<folder>.lease   claimed: {"worker", "expires"}
+    <work_dir>/done/<folder>           finished: name of the worker whose result counts
+    <work_dir>/failed/<folder>         failed attempts so far: {"attempts", "worker", "error"}
+    <work_dir>/shards/<worker>.jsonl   one result or error record per attempt
+
+- claim: write a private temp file, then hard-link it to the lease name;
+  the link fails if the lease exists, so exactly one worker wins
+- heartbeat: the owner rewrites its lease (temp file + atomic rename)
+  before it expires
+- expiry: a lease past "expires" belongs to a crashed worker; it is moved
+  aside with one atomic rename (only one contender succeeds), then the
+  folder is claimed again. A lease that cannot be read (truncated or
+  corrupt) expires once its mtime is older than the TTL
+- failure: a folder whose processing raises gets an error record and its
+  lease is released for another attempt; after max_attempts the error
+  record is committed like a result and the worker moves on
+- merge: the record named by done/<folder> wins, so a slow worker whose
+  lease was taken over cannot double-count; committed error records are
+  listed under "failed"
+
+Lease expiry compares wall clocks, so keep node clocks in sync (NTP) and
+the TTL well above the time one folder takes.
+
+    python -m OCR.shard_batch work --work-dir shared/run1 [--ttl 600]
+    python -m OCR.shard_batch merge --work-dir shared/run1
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+
+DEFAULT_TTL = 600
+DEFAULT_MAX_ATTEMPTS = 3
+POLL_INTERVAL = 5
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class LeaseDir:
+    def __init__(self, work_dir, worker, ttl=DEFAULT_TTL, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.work_dir = work_dir
+        self.worker = worker
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.leases = os.path.join(work_dir, "leases")
+        self.done = os.path.join(work_dir, "done")
+        self.failed = os.path.join(work_dir, "failed")
+        self.shards = os.path.join(work_dir, "shards")
+        for d in (self.leases, self.done, self.failed, self.shards):
+            os.makedirs(d, exist_ok=True)
+
+    def lease_path(self, folder):
+        return os.path.join(self.leases, f"{folder}.lease")
+
+    def is_done(self, folder):
+        return os.path.exists(os.path.join(self.done, folder))
+
+    def _lease_body(self):
+        return json.dumps({"worker": self.worker, "expires": time.time() + self.ttl})
+
+    def claim(self, folder):
+        """True if this worker now holds the folder's lease"""
+        if self.is_done(folder):
+            return False
+        path = self.lease_path(folder)
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if stat is not None:
+            lease = _read_json(path)
+            if lease is not None:
+                expires = lease.get("expires", 0)
+            else:
+                # Unreadable (truncated, corrupt): judge it by its age
+                expires = stat.st_mtime + self.ttl
+            if expires > time.time():
+                return False
+            # Expired: move it aside; only one contender's rename succeeds
+            aside = f"{path}.expired.{uuid.uuid4().hex}"
+            try:
+                os.rename(path, aside)
+            except FileNotFoundError:
+                return False
+            if os.stat(aside).st_ino != stat.st_ino or _read_json(aside) != lease:
+                # Another contender reclaimed it between our read and rename:
+                # that fresh lease is theirs, put it back
+                try:
+                    os.link(aside, path)
+                except FileExistsError:
+                    pass
+                os.unlink(aside)
+                return False
+            os.unlink(aside)
+            holder = lease.get("worker") if lease is not None else "unreadable"
+            print(f"  lease of {folder} expired (was {holder}), reclaiming")
+
+        tmp = os.path.join(self.leases, f".{folder}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self._lease_body())
+        try:
+            os.link(tmp, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(tmp)
+
+    def owns(self, folder):
+        lease = _read_json(self.lease_path(folder))
+        return lease is not None and lease.get("worker") == self.worker
+
+    def renew(self, folder):
+        if self.owns(folder):
+            _write_atomic(self.lease_path(folder), self._lease_body())
+
+    def commit(self, folder):
+        """Mark done (if the lease is still ours) and release the lease"""
+        if not self.owns(folder):
+            return False
+        _write_atomic(os.path.join(self.done, folder), self.worker)
+        try:
+            os.unlink(self.lease_path(folder))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def release(self, folder):
+        if self.owns(folder):
+            try:
+                os.unlink(self.lease_path(folder))
+            except FileNotFoundError:
+                pass
+
+    def fail(self, folder, error):
+        """
+        Count a failed attempt (if the lease is still ours). Returns True
+        when this was the last attempt and the folder is now committed with
+        its error record; otherwise the lease is released for a retry.
+        """
+        if not self.owns(folder):
+            return False
+        path = os.path.join(self.failed, folder)
+        attempts = (_read_json(path) or {}).get("attempts", 0) + 1
+        _write_atomic(path, json.dumps({"attempts": attempts, "worker": self.worker, "error": error}))
+        if attempts >= self.max_attempts:
+            return self.commit(folder)
+        self.release(folder)
+        return False
+
+
+class _Heartbeat(threading.Thread):
+    """Renews the current lease every ttl / 3 while a folder is processed"""
+
+    def __init__(self, leases):
+        super().__init__(daemon=True)
+        self.leases = leases
+        self.folder = None
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.wait(self.leases.ttl / 3):
+            folder = self.folder
+            if folder is not None:
+                self.leases.renew(folder)
+
+
+# ===============================
+# WORKER
+# ===============================
+
+def list_folders(root, max_folders=None):
+    folders = sorted(f for f in os.listdir(root) if os.path.isdir(os.path.join(root, f)))
+    return folders[:max_folders] if max_folders else folders
+
+
+def _dry_run_folder(root):
+    """Lists the images a folder would OCR, without loading any engine"""
+    from OCR.Main_ocr import _is_primary, get_base
+
+    def process(folder):
+        names = [n for n in os.listdir(os.path.join(root, folder)) if _is_primary(n)]
+        return get_base(folder), [{"file": n, "text": "[dry run]", "engine": None} for n in names]
+    return process
+
+
+def run_worker(work_dir, root=None, max_folders=None, ttl=DEFAULT_TTL, wait=True,
+               dry_run=False, worker=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Claim and process folders until every folder is done. A folder that
+    raises is retried (by any worker) up to max_attempts times in all, then
+    committed with its error record.
+    """
+    if dry_run:
+        from OCR.Main_ocr import CROPS_ROOT_DIR
+        root = root or CROPS_ROOT_DIR
+        process = _dry_run_folder(root)
+    else:
+        from OCR import Main_ocr
+        root = root or Main_ocr.CROPS_ROOT_DIR
+        Main_ocr.CROPS_ROOT_DIR = root
+        process = Main_ocr.process_folder
+
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    leases = LeaseDir(work_dir, worker, ttl, max_attempts)
+    folders = list_folders(root, max_folders)
+    shard_path = os.path.join(leases.shards, f"{worker}.jsonl")
+
+    heartbeat = _Heartbeat(leases)
+    heartbeat.start()
+    processed = 0
+    failed = 0
+
+    def write(shard, record):
+        shard.write(json.dumps(record, ensure_ascii=False) + "\n")
+        shard.flush()
+        os.fsync(shard.fileno())
+
+    with open(shard_path, "a", encoding="utf-8") as shard:
+        while True:
+            remaining = [f for f in folders if not leases.is_done(f)]
+            if not remaining:
+                break
+
+            claimed_any = False
+            for folder in remaining:
+                if not leases.claim(folder):
+                    continue
+                claimed_any = True
+                heartbeat.folder = folder
+                try:
+                    base, pages = process(folder)
+                except Exception as e:
+                    heartbeat.folder = None
+                    error = f"{type(e).__name__}: {e}"
+                    print(f"  {folder} failed: {error}")
+                    if not leases.owns(folder):
+                        continue
+                    write(shard, {"folder": folder, "error": error,
+                                  "worker": worker, "finished": time.time()})
+                    if leases.fail(folder, error):
+                        failed += 1
+                        print(f"  {folder}: giving up after {max_attempts} attempts")
+                    continue
+
+                heartbeat.folder = None
+                if not leases.owns(folder):
+                    print(f"  lost lease of {folder}; result discarded")
+                    continue
+                write(shard, {"folder": folder, "base": base, "pages": pages,
+                              "worker": worker, "finished": time.time()})
+                if leases.commit(folder):
+                    processed += 1
+
+            # Everything left is leased by live workers: wait for them or their expiry
+            if not claimed_any:
+                if not wait:
+                    break
+                time.sleep(min(POLL_INTERVAL, ttl))
+
+    heartbeat.stop.set()
+    print(f"Worker {worker}: {processed} folders, {failed} failed")
+    return processed
+
+
+# ===============================
+# MERGE
+# ===============================
+
+def merge_shards(work_dir, output_path=None):
+    """Final {"documents", "summary"} JSON from the committed shard records"""
+    from OCR.Main_ocr import OUTPUT_PATH, build_summary
+    output_path = output_path or OUTPUT_PATH
+
+    done_dir = os.path.join(work_dir, "done")
+    committed = {}
+    for folder in os.listdir(done_dir):
+        if folder.endswith(".tmp"):
+            continue
+        with open(os.path.join(done_dir, folder), "r", encoding="utf-8") as f:
+            committed[folder] = f.read().strip()
+
+    records = {}
+    shards_dir = os.path.join(work_dir, "shards")
+    for name in sorted(os.listdir(shards_dir)):
+        with open(os.path.join(shards_dir, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of a crashed worker
+                if committed.get(record["folder"]) == record["worker"]:
+                    # A worker's last record for the folder is the one it committed
+                    records[record["folder"]] = record
+
+    output = {}
+    failed = {}
+    for folder in sorted(records):
+        record = records[folder]
+        if "error" in record:
+            failed[folder] = record["error"]
+        else:
+            output[record["base"]] = record["pages"]
+
+    missing = sorted(set(committed) - set(records))
+    if missing:
+        print(f"Warning: {len(missing)} done folders without a shard record: {missing[:5]}")
+
+    if failed:
+        print(f"Warning: {len(failed)} folders failed every attempt: {sorted(failed)[:5]}")
+
+    final_output = {"documents": output, "summary": build_summary(output)}
+    if failed:
+        final_output["failed"] = failed
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(final_output, f, indent=2, ensure_ascii=False)
+
+    print(f"Merged {len(output)} folders into {output_path}")
+    return final_output
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sharded batch OCR over a shared directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    work = sub.add_parser("work", help="claim and OCR folders until all are done")
+    work.add_argument("--work-dir", required=True)
+    work.add_argument("--crops-root", default=None)
+    work.add_argument("--max-folders", type=int, default=None)
+    work.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="lease lifetime in seconds")
+    work.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                      help="attempts per folder before its error is committed")
+    work.add_argument("--no-wait", action="store_true",
+                      help="exit when nothing is claimable instead of waiting for other workers")
+    work.add_argument("--dry-run", action="store_true", help="list images instead of running OCR")
+
+    merge = sub.add_parser("merge", help="merge worker shards into the final JSON")
+    merge.add_argument("--work-dir", required=True)
+    merge.add_argument("--output", default=None)
+
+    args = parser.parse_args()
+    if args.command == "work":
+        run_worker(args.work_dir, args.crops_root, args.max_folders, args.ttl,
+                   wait=not args.no_wait, dry_run=args.dry_run, max_attempts=args.max_attempts)
+    else:
+        merge_shards(args.work_dir, args.output)
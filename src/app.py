@@ -1,35 +1,46 @@
+import hashlib
 import streamlit as st
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from language_detector import detect_language_from_regions  # NEW IMPORT
 
 from NER.ocr_ner_pipeline import process_image
+from detection import load_detector
+import metrics
 
 st.set_page_config(layout="wide", page_title="Nepali OCR + NER")
 st.title("📄 Nepali Document OCR & NER")
 
 @st.cache_resource
-def load_yolo():
-    return YOLO("runs/detect/train/weights/best.pt")  # or your trained model
+def get_detector():
+    # torch by default; DETECTOR_BACKEND=onnx (+ DETECTOR_WEIGHTS) for ONNX Runtime
+    return load_detector()
 
-yolo = load_yolo()
+detector = get_detector()
+
+# ===============================
+# PER-UPLOAD CACHES
+# ===============================
+# Keyed on the upload's content hash (arguments starting with "_" are not
+# hashed), so reruns from widget changes never repeat inference.
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def detect_regions(digest, _image):
+    return detector.detect(_image)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_ocr_ner(digest, language, _image, _detections):
+    return process_image(_image, _detections, language=language, with_metrics=True)
 
-CLASS_NAMES = [
-    "Id_card_boundary",
-    "text_block_primary",
-    "text_block_secondary",
-    "fingerprint_region",
-    "photo_region",
-    "header_text_block",
-]
 
 # NEW: Language selector with auto-detect option
 language_option = st.selectbox(
     "OCR Language",
-    options=["auto", "en", "ne"],
+    options=["auto", "script", "en", "ne"],
     format_func=lambda x: {
         "auto": "Auto-detect from document",
+        "script": "Auto-detect per region (experimental)",
         "en": "English (force)",
         "ne": "Nepali (force)"
     }[x]
@@ -38,23 +49,15 @@ language_option = st.selectbox(
 uploaded = st.file_uploader("Upload document image", type=["jpg", "png", "jpeg"])
 
 if uploaded:
+    data = uploaded.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
     image = cv2.imdecode(
-        np.frombuffer(uploaded.read(), np.uint8),
+        np.frombuffer(data, np.uint8),
         cv2.IMREAD_COLOR
     )
 
     with st.spinner("Running detection..."):
-        result = yolo(image)[0]
-
-    detections = []
-    if result.boxes is not None:
-        boxes = result.boxes.cpu().numpy()
-        for box, cls, conf in zip(boxes.xyxy, boxes.cls, boxes.conf):
-            detections.append({
-                "bbox": list(map(int, box)),
-                "class": CLASS_NAMES[int(cls)],
-                "confidence": float(conf)
-            })
+        detections = detect_regions(digest, image)
     
     # NEW: Show detected regions summary
     region_counts = {}
@@ -68,7 +71,21 @@ if uploaded:
             st.sidebar.write(f"• {region}: {count}")
 
     with st.spinner("Running OCR + NER..."):
-        output = process_image(image, detections, language=language_option)
+        output = run_ocr_ner(digest, language_option, image, detections)
+
+    # Pipeline metrics of the run that produced these results
+    if output.get("metrics"):
+        m = output["metrics"]
+        st.sidebar.subheader("⏱️ Pipeline Metrics")
+        st.sidebar.write(f"• total: {m['total_s'] * 1000:.0f} ms")
+        for stage, s in m["stages"].items():
+            st.sidebar.write(f"• {stage}: {s['wall_s'] * 1000:.0f} ms (CPU {s['cpu_s'] * 1000:.0f} ms)")
+        for name, count in m["counters"].items():
+            st.sidebar.write(f"• {name}: {count}")
+        st.sidebar.download_button(
+            "Prometheus metrics", metrics.to_prometheus(),
+            file_name="metrics.prom", mime="text/plain"
+        )
 
     col1, col2 = st.columns(2)
 
@@ -98,6 +115,10 @@ if uploaded:
             "unknown": "Unknown"
         }.get(detected_lang, detected_lang)
         
+        confidence = output.get("language_confidence")
+        if confidence is not None:
+            lang_display += f" · {confidence:.0%}"
+
         st.subheader(f"OCR Results ({lang_display})")
         st.text_area("Extracted text", output["text"], height=220)
 
@@ -110,4 +131,8 @@ if uploaded:
         
         # NEW: Show engines used
         if output.get("ocr_engines_used"):
-            st.caption(f"Engines used: {', '.join(output['ocr_engines_used'])}")
\ No newline at end of file
+            st.caption(f"Engines used: {', '.join(output['ocr_engines_used'])}")
+
+        if output.get("skipped_regions"):
+            reasons = ", ".join(r["reason"] for r in output["skipped_regions"])
+            st.caption(f"Skipped {len(output['skipped_regions'])} region(s) before OCR: {reasons}")
\ No newline at end of file
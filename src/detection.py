@@ -0,0 +1,281 @@
+"""
+detection.py
+YOLO layout detection shared by the app, the cropping script and the
+streaming pipeline.
+
+Backends (same detection dicts either way):
+- "torch": ultralytics YOLO on the .pt weights
+- "onnx":  ONNX Runtime on an exported model, optionally dynamic-int8
+           quantized; needs only onnxruntime + numpy + OpenCV at runtime
+
+Export once with:
+    python src/detection.py export [--weights best.pt] [--quantize]
+"""
+import os
+
+import cv2
+import numpy as np
+
+DEFAULT_WEIGHTS = "runs/detect/train/weights/best.pt"
+DEFAULT_ONNX = "runs/detect/train/weights/best.onnx"
+
+CLASS_NAMES = [
+    "Id_card_boundary",
+    "text_block_primary",
+    "text_block_secondary",
+    "fingerprint_region",
+    "photo_region",
+    "header_text_block",
+]
+
+# ultralytics predict() defaults, so both backends agree
+IMGSZ = 640
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DET = 300
+
+# Class offset for class-aware NMS in one pass (as ultralytics does)
+_MAX_WH = 7680
+
+
+# ===============================
+# TORCH (ULTRALYTICS)
+# ===============================
+
+def load_yolo(weights=DEFAULT_WEIGHTS):
+    from ultralytics import YOLO
+    return YOLO(weights)
+
+
+def to_detections(result):
+    """
+    Convert one ultralytics result into detection dicts:
+    {"bbox": [x1, y1, x2, y2], "class": name, "confidence": score}
+    """
+    detections = []
+    if result.boxes is not None:
+        boxes = result.boxes.cpu().numpy()
+        for box, cls, conf in zip(boxes.xyxy, boxes.cls, boxes.conf):
+            detections.append({
+                "bbox": list(map(int, box)),
+                "class": CLASS_NAMES[int(cls)],
+                "confidence": float(conf)
+            })
+    return detections
+
+
+class Detector:
+    """Common interface: images in, detection dicts out"""
+
+    backend = None
+
+    def detect_batch(self, images):
+        raise NotImplementedError
+
+    def detect(self, image):
+        return self.detect_batch([image])[0]
+
+    def __call__(self, image):
+        return self.detect(image)
+
+
+class TorchDetector(Detector):
+    backend = "torch"
+
+    def __init__(self, weights=DEFAULT_WEIGHTS):
+        self.weights = weights
+        self.model = load_yolo(weights)
+
+    def detect_batch(self, images):
+        if not images:
+            return []
+        return [to_detections(r) for r in self.model(images, verbose=False)]
+
+
+# ===============================
+# ONNX RUNTIME
+# ===============================
+
+def letterbox(image, size=IMGSZ):
+    """
+    Resize keeping aspect ratio and pad to a size x size square with gray
+    (114), centred: ultralytics' LetterBox(auto=False, scaleup=True, center=True),
+    the preprocessing it uses for fixed-shape inputs. The torch backend
+    pads only up to a multiple of the stride (auto=True) when a batch
+    shares one shape, so its boxes can differ slightly from these;
+    benchmarks/bench_detector.py checks the box IoU between the two.
+    Returns (padded, gain, (pad_x, pad_y)).
+    """
+    h, w = image.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = round(w * gain), round(h * gain)
+    dw, dh = (size - new_w) / 2, (size - new_h) / 2
+
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = round(dh - 0.1), round(dh + 0.1)
+    left, right = round(dw - 0.1), round(dw + 0.1)
+    padded = cv2.copyMakeBorder(image, top, bottom, left, right,
+                                cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return padded, gain, (left, top)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy NMS on xyxy boxes; returns kept indices, best score first"""
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxDetector(Detector):
+    """YOLOv8 detection head exported to ONNX: output (B, 4 + classes, anchors)"""
+
+    backend = "onnx"
+
+    def __init__(self, model_path=DEFAULT_ONNX, imgsz=IMGSZ, conf=CONF_THRESHOLD,
+                 iou=IOU_THRESHOLD, max_det=MAX_DET, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        # Static exports only take batch 1
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.max_batch = batch_dim if isinstance(batch_dim, int) else None
+
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+    def _prepare(self, images):
+        batch = np.empty((len(images), 3, self.imgsz, self.imgsz), np.float32)
+        meta = []
+        for k, image in enumerate(images):
+            padded, gain, pad = letterbox(image, self.imgsz)
+            # BGR HWC uint8 → RGB CHW float in [0, 1]
+            batch[k] = padded[:, :, ::-1].transpose(2, 0, 1)
+            meta.append((gain, pad, image.shape[:2]))
+        batch *= 1.0 / 255
+        return batch, meta
+
+    def _decode(self, prediction, gain, pad, shape):
+        prediction = prediction.T  # (anchors, 4 + classes)
+        scores_all = prediction[:, 4:]
+        classes = scores_all.argmax(axis=1)
+        scores = scores_all[np.arange(len(classes)), classes]
+
+        mask = scores > self.conf
+        if not mask.any():
+            return []
+        boxes, scores, classes = prediction[mask, :4], scores[mask], classes[mask]
+
+        # cx, cy, w, h → x1, y1, x2, y2
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+
+        keep = nms(xyxy + classes[:, None] * _MAX_WH, scores, self.iou)[:self.max_det]
+        xyxy, scores, classes = xyxy[keep], scores[keep], classes[keep]
+
+        # Undo the letterbox
+        h, w = shape
+        xyxy[:, [0, 2]] = ((xyxy[:, [0, 2]] - pad[0]) / gain).clip(0, w)
+        xyxy[:, [1, 3]] = ((xyxy[:, [1, 3]] - pad[1]) / gain).clip(0, h)
+
+        return [
+            {
+                "bbox": list(map(int, box)),
+                "class": CLASS_NAMES[int(cls)],
+                "confidence": float(score)
+            }
+            for box, cls, score in zip(xyxy, classes, scores)
+        ]
+
+    def detect_batch(self, images):
+        if not images:
+            return []
+        step = self.max_batch or len(images)
+        results = []
+        for start in range(0, len(images), step):
+            chunk = images[start:start + step]
+            batch, meta = self._prepare(chunk)
+            output = self.session.run(None, {self.input_name: batch})[0]
+            results.extend(self._decode(p, *m) for p, m in zip(output, meta))
+        return results
+
+
+# ===============================
+# EXPORT / FACTORY
+# ===============================
+
+def export_onnx(weights=DEFAULT_WEIGHTS, imgsz=IMGSZ, quantize=False, dynamic=True):
+    """
+    Export the .pt weights to ONNX (dynamic batch) next to them. With
+    quantize=True a dynamic-int8 copy (<name>.int8.onnx) is also written.
+    Returns the path of the model to load.
+    """
+    from ultralytics import YOLO
+    path = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True)
+    if not quantize:
+        return path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantized = os.path.splitext(path)[0] + ".int8.onnx"
+    quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+    return quantized
+
+
+def load_detector(backend=None, weights=None, **kwargs):
+    """
+    backend: "torch" | "onnx" (default: $DETECTOR_BACKEND or "torch")
+    weights: .pt for torch, .onnx for onnx (default: $DETECTOR_WEIGHTS or the
+             backend's default path)
+    """
+    backend = backend or os.environ.get("DETECTOR_BACKEND", "torch")
+    weights = weights or os.environ.get("DETECTOR_WEIGHTS")
+    if backend == "torch":
+        return TorchDetector(weights or DEFAULT_WEIGHTS)
+    if backend == "onnx":
+        return OnnxDetector(weights or DEFAULT_ONNX, **kwargs)
+    raise ValueError(f"Unknown detector backend '{backend}'. Use 'torch' or 'onnx'.")
+
+
+def detect_batch(model, images):
+    """One forward pass over a list of images (a Detector or a raw YOLO model)"""
+    if not images:
+        return []
+    if isinstance(model, Detector):
+        return model.detect_batch(images)
+    return [to_detections(r) for r in model(images, verbose=False)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Layout detector utilities")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export the YOLO weights to ONNX")
+    export.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    export.add_argument("--imgsz", type=int, default=IMGSZ)
+    export.add_argument("--quantize", action="store_true", help="also write a dynamic-int8 model")
+    args = parser.parse_args()
+
+    print(f"Exported: {export_onnx(args.weights, args.imgsz, args.quantize)}")
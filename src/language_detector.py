@@ -1,7 +1,10 @@
 """
 language_detector.py
-Unified language detection based on YOLO region detections
+Unified language detection based on YOLO region detections, and a
+Devanagari-vs-Latin script classifier on the crop pixels
 """
+import cv2
+import numpy as np
 
 def detect_language_from_regions(detections, default="ne"):
     """
@@ -69,4 +72,95 @@ def get_language_from_folder(folder_path, default="ne"):
     elif fingerprint_files and photo_files:
         return default
     else:
-        return default
\ No newline at end of file
+        return default
+
+
+# ===============================
+# SCRIPT CLASSIFIER (CROP PIXELS)
+# ===============================
+
+# Devanagari letters of a word hang from one headline (shirorekha), so a
+# word is a single wide connected component crossed by a long horizontal
+# ink run. Latin letters are separate, roughly square components whose
+# horizontal strokes are shorter than the letter height.
+#   aspect:   area-weighted mean log(width / height) of letter-sized components
+#   headline: fraction of their ink in horizontal runs at least one
+#             component height long
+# P(Devanagari) = sigmoid(aspect * w_aspect + headline * w_headline + bias).
+# The weights are hand-set from the feature geometry, not fitted, so
+# per-region routing stays opt-in (language="script"); fit them with
+# benchmarks/bench_script_classifier.py --fit, which also reports the
+# script vote against the layout heuristic per document.
+SCRIPT_WEIGHTS = {"aspect": 2.0, "headline": 15.0, "bias": -2.0}
+
+# Crops are shrunk to at most this many pixels on the long side first
+_SCRIPT_MAX_SIDE = 400
+
+
+def script_features(crop):
+    """[aspect, headline] for one crop, or None if it has no usable letters"""
+    gray = crop if crop.ndim == 2 else cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    scale = _SCRIPT_MAX_SIDE / max(h, w)
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if cv2.countNonZero(ink) > ink.size // 2:
+        ink = cv2.bitwise_not(ink)  # light text on a dark background
+
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+
+    # Letters and words: drop specks first, then dots, vowel signs above the
+    # line, punctuation (shorter than half a letter) and rules or borders
+    # (much taller than a letter, or long and flat)
+    keep = (heights >= 4) & (areas >= 8)
+    if np.count_nonzero(keep) < 2:
+        return None
+    letter = float(np.median(heights[keep]))
+    keep &= (heights >= 0.5 * letter) & (heights <= 3 * letter)
+    if np.count_nonzero(keep) < 2:
+        return None
+
+    aspect = float(np.average(np.log(widths[keep] / heights[keep]), weights=areas[keep]))
+
+    mask = np.concatenate(([False], keep))[labels]
+    letters = np.where(mask, ink, 0).astype(np.uint8)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(round(letter))), 1))
+    runs = cv2.morphologyEx(letters, cv2.MORPH_OPEN, kernel)
+    headline = cv2.countNonZero(runs) / max(cv2.countNonZero(letters), 1)
+
+    return np.array([aspect, headline])
+
+
+def devanagari_probability(features, weights=None):
+    w = SCRIPT_WEIGHTS if weights is None else weights
+    z = features[0] * w["aspect"] + features[1] * w["headline"] + w["bias"]
+    return float(1.0 / (1.0 + np.exp(-z)))
+
+
+def classify_script(crop, weights=None):
+    """
+    ("ne" | "en", P(Devanagari)) for one text crop; None for crops with no
+    usable letters.
+    """
+    features = script_features(crop)
+    if features is None:
+        return None
+    p = devanagari_probability(features, weights)
+    return ("ne" if p >= 0.5 else "en"), p
+
+
+def document_language(region_scripts, default="ne"):
+    """
+    Combine per-region (weight, P(Devanagari)) pairs (weight: crop area)
+    into (language, confidence); (default, None) without any.
+    """
+    total = sum(weight for weight, _ in region_scripts)
+    if not total:
+        return default, None
+    p = sum(weight * p for weight, p in region_scripts) / total
+    return ("ne", p) if p >= 0.5 else ("en", 1.0 - p)
@@ -0,0 +1,149 @@
+"""
+metrics.py
+Instrumentation for the OCR/NER pipeline.
+
+A Trace records, for one process_image(s) call:
+- per-stage wall and CPU (process) time; stages may nest, and stages run
+  on several threads at once add up
+- counters (regions, cache hits, fallbacks, ...)
+
+The active trace is held in a context variable, so loaders and OCR routers
+record into it without threading it through every call; code outside a
+trace records into a no-op. Finished traces are folded into REGISTRY,
+which renders process-wide totals in Prometheus text format.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+PREFIX = "bdocr"
+
+
+class Trace:
+    def __init__(self):
+        self.stages = {}
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            with self._lock:
+                s = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+                s["wall_s"] += wall
+                s["cpu_s"] += cpu
+                s["calls"] += 1
+
+    def count(self, name, n=1):
+        if n:
+            with self._lock:
+                self.counters[name] += n
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "total_s": time.perf_counter() - self._start,
+                "stages": {k: dict(v) for k, v in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+
+class _NullTrace:
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def count(self, name, n=1):
+        pass
+
+
+_NULL = _NullTrace()
+_current = contextvars.ContextVar("trace", default=_NULL)
+
+
+def current():
+    """The active trace, or a no-op one"""
+    return _current.get()
+
+
+@contextmanager
+def tracing(trace=None):
+    """Make `trace` (a new one by default) active for the block"""
+    trace = trace or Trace()
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def bind(fn):
+    """Wrap fn to run in the caller's context, for worker threads"""
+    parent = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return parent.copy().run(fn, *args, **kwargs)
+    return run
+
+
+# ===============================
+# PROCESS-WIDE TOTALS
+# ===============================
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.stage_wall = defaultdict(float)
+        self.stage_cpu = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def observe(self, trace, documents=1):
+        snapshot = trace.as_dict()
+        with self._lock:
+            self.documents += documents
+            for name, s in snapshot["stages"].items():
+                self.stage_wall[name] += s["wall_s"]
+                self.stage_cpu[name] += s["cpu_s"]
+                self.stage_calls[name] += s["calls"]
+            for name, n in snapshot["counters"].items():
+                self.counters[name] += n
+
+    def to_prometheus(self):
+        lines = []
+
+        def metric(name, help_text, samples, label=None):
+            full = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(samples.items()):
+                labels = f'{{{label}="{key}"}}' if label else ""
+                lines.append(f"{full}{labels} {value}")
+
+        with self._lock:
+            metric("documents_total", "Documents processed", {None: self.documents})
+            metric("stage_wall_seconds_total", "Wall time per pipeline stage",
+                   self.stage_wall, "stage")
+            metric("stage_cpu_seconds_total", "Process CPU time per pipeline stage",
+                   self.stage_cpu, "stage")
+            metric("stage_calls_total", "Calls per pipeline stage", self.stage_calls, "stage")
+            metric("events_total", "Pipeline counters (regions, cache, fallbacks)",
+                   self.counters, "event")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def to_prometheus():
+    return REGISTRY.to_prometheus()
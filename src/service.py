@@ -0,0 +1,337 @@
+"""
+service.py
+Headless HTTP inference service (asyncio, standard library only).
+
+    POST /ocr?language=auto|en|ne|script   body: image bytes (jpg/png)
+    POST /ner                              body: {"text": "..."} or {"texts": [...]}
+    GET  /health
+    GET  /metrics                          Prometheus text
+
+Concurrent /ocr requests are collected into micro-batches. A batch closes
+at max_batch images or max_wait seconds after its first request, whichever
+comes first. Detection then runs once per batch, and OCR once per language
+(process_images). The queue in front of the batcher is bounded: when it is
+full, requests are answered 429 right away instead of piling up.
+
+    python src/service.py [--port 8080] [--max-batch 8] [--max-wait-ms 20]
+"""
+import json
+import asyncio
+from dataclasses import asdict
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+import metrics
+from detection import load_detector
+from NER.ocr_ner_pipeline import process_images, _load_labeler
+
+MAX_BODY = 20 * 1024 * 1024
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or REASONS[status])
+        self.status = status
+
+
+class Overloaded(Exception):
+    pass
+
+
+# ===============================
+# MICRO-BATCHER
+# ===============================
+
+class MicroBatcher:
+    """
+    Collects submitted items into batches for `handler(items) -> results`
+    (one result or Exception per item), run one batch at a time on a
+    single worker thread: the models are not called concurrently.
+    """
+
+    def __init__(self, handler, max_batch=8, max_wait=0.02, max_queue=32):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch")
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise Overloaded()
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.handler, items)
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue  # client went away
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+# ===============================
+# SERVICE
+# ===============================
+
+def to_json(output, detections):
+    return {
+        "text": output["text"],
+        "entities": [asdict(e) for e in output["entities"]],
+        "ocr_engines_used": output["ocr_engines_used"],
+        "detected_language": output["detected_language"],
+        "language_confidence": output["language_confidence"],
+        "skipped_regions": output["skipped_regions"],
+        "detections": detections,
+    }
+
+
+class Service:
+    def __init__(self, detector, max_batch=8, max_wait=0.02, max_queue=32):
+        self.detector = detector
+        self.labeler = _load_labeler()
+        self.batcher = MicroBatcher(self._ocr_batch, max_batch, max_wait, max_queue)
+        self.batches = 0
+
+    # ---- batch handler (worker thread) ----
+
+    def _ocr_batch(self, items):
+        """items: [(image bytes, language)] → [result dict or Exception]"""
+        self.batches += 1
+        results = [None] * len(items)
+
+        images = {}
+        for i, (data, _) in enumerate(items):
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                results[i] = HTTPError(400, "could not decode image")
+            else:
+                images[i] = image
+
+        order = list(images)
+        detections = dict(zip(order, self.detector.detect_batch([images[i] for i in order])))
+
+        by_language = {}
+        for i in order:
+            by_language.setdefault(items[i][1], []).append(i)
+
+        for language, idx in by_language.items():
+            try:
+                outputs = process_images(
+                    [images[i] for i in idx], [detections[i] for i in idx], language=language
+                )
+                for i, output in zip(idx, outputs):
+                    results[i] = to_json(output, detections[i])
+            except Exception as e:
+                for i in idx:
+                    results[i] = e
+        return results
+
+    # ---- endpoints ----
+
+    async def ocr(self, request):
+        if request["method"] != "POST":
+            raise HTTPError(405)
+        if not request["body"]:
+            raise HTTPError(400, "empty body: send the image bytes")
+        language = request["query"].get("language", ["auto"])[0]
+        if language not in ("auto", "en", "ne", "script"):
+            raise HTTPError(400, "language must be auto, en, ne or script")
+        return 200, await self.batcher.submit((request["body"], language))
+
+    async def ner(self, request):
+        if request["method"] != "POST":
+            raise HTTPError(405)
+        try:
+            payload = json.loads(request["body"] or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, 'expected a JSON object with "text" or "texts"')
+        texts = payload.get("texts")
+        if texts is None:
+            if "text" not in payload:
+                raise HTTPError(400, 'expected "text" or "texts"')
+            texts = [payload["text"]]
+
+        loop = asyncio.get_running_loop()
+        labeled = await loop.run_in_executor(
+            None, lambda: [self.labeler.label_text(t) for t in texts]
+        )
+        entities = [[asdict(e) for e in ents] for ents in labeled]
+        if "texts" in payload:
+            return 200, {"entities": entities}
+        return 200, {"entities": entities[0]}
+
+    async def health(self, request):
+        return 200, {
+            "status": "ok",
+            "queued": self.batcher.queue.qsize(),
+            "batches": self.batches,
+        }
+
+    async def prometheus(self, request):
+        return 200, metrics.to_prometheus()
+
+    # ---- HTTP ----
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+
+        headers = {}
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", ""):
+            raise HTTPError(411)
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY:
+            raise HTTPError(413)
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        return {
+            "method": method.upper(),
+            "path": url.path,
+            "query": parse_qs(url.query),
+            "headers": headers,
+            "body": body,
+        }
+
+    @staticmethod
+    def _encode(status, payload, keep_alive):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == 429:
+            head.append("Retry-After: 1")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+    async def handle(self, reader, writer):
+        routes = {"/ocr": self.ocr, "/ner": self.ner, "/health": self.health, "/metrics": self.prometheus}
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = request["headers"].get("connection", "").lower() != "close"
+                    route = routes.get(request["path"])
+                    if route is None:
+                        raise HTTPError(404)
+                    status, payload = await route(request)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Overloaded:
+                    status, payload = 429, {"error": "overloaded, retry later"}
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                writer.write(self._encode(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.batcher.start()
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(service, host, port):
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OCR/NER HTTP service with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    parser.add_argument("--max-queue", type=int, default=32,
+                        help="requests waiting beyond this get 429")
+    parser.add_argument("--backend", default=None, choices=["torch", "onnx"])
+    parser.add_argument("--weights", default=None)
+    args = parser.parse_args()
+
+    service = Service(
+        load_detector(args.backend, args.weights),
+        max_batch=args.max_batch,
+        max_wait=args.max_wait_ms / 1000,
+        max_queue=args.max_queue,
+    )
+    asyncio.run(serve(service, args.host, args.port))
@@ -0,0 +1,268 @@
+"""
+stream_pipeline.py
+Streaming pipeline from raw document images to OCR + NER results.
+
+    decode (thread pool, prefetching)
+        → YOLO (batched)
+        → in-memory crops → OCR → NER (process_image)
+        → results, one per image, as soon as they are ready
+
+Stages are connected by bounded queues, so memory stays flat however many
+images go in. Crops are only written to disk when a debug directory is given.
+"""
+import os
+import json
+import queue
+import threading
+from collections import deque
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from detection import load_detector, detect_batch
+from NER.ocr_ner_pipeline import process_image
+from NER.entity_store import EntityStore
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+_DONE = object()
+
+
+# ===============================
+# STAGES
+# ===============================
+
+def list_images(image_dir):
+    for name in sorted(os.listdir(image_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            yield os.path.join(image_dir, name)
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    """Blocking get that returns _DONE once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _decode_stage(paths, out_q, stop, workers, prefetch):
+    """cv2.imread on a thread pool, at most `prefetch` images in flight"""
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for path in paths:
+                if stop.is_set():
+                    return
+                pending.append((path, pool.submit(cv2.imread, path)))
+                if len(pending) >= prefetch:
+                    path, future = pending.popleft()
+                    if not _put(out_q, (path, future.result()), stop):
+                        return
+            while pending:
+                path, future = pending.popleft()
+                if not _put(out_q, (path, future.result()), stop):
+                    return
+    finally:
+        _put(out_q, _DONE, stop)
+
+
+def _detect_stage(model, in_q, out_q, stop, batch_size, batch_wait):
+    """Group whatever decoded images are ready (up to batch_size) into one YOLO call"""
+    done = False
+    try:
+        while not done and not stop.is_set():
+            item = _get(in_q, stop)
+            if item is _DONE:
+                break
+
+            batch = [item]
+            while len(batch) < batch_size:
+                try:
+                    nxt = in_q.get(timeout=batch_wait)
+                except queue.Empty:
+                    break
+                if nxt is _DONE:
+                    done = True
+                    break
+                batch.append(nxt)
+
+            decoded = [(path, img) for path, img in batch if img is not None]
+            for path, img in batch:
+                if img is None and not _put(out_q, (path, None, None, "Failed to load image"), stop):
+                    return
+
+            try:
+                all_detections = detect_batch(model, [img for _, img in decoded])
+            except Exception as e:
+                for path, _ in decoded:
+                    if not _put(out_q, (path, None, None, f"Detection failed: {e}"), stop):
+                        return
+                continue
+
+            for (path, img), detections in zip(decoded, all_detections):
+                if not _put(out_q, (path, img, detections, None), stop):
+                    return
+    finally:
+        _put(out_q, _DONE, stop)
+
+
+def save_debug_crops(image, detections, debug_dir, base_name):
+    """Same layout as cropping.py: <debug_dir>/<image>/<image>-<class>_area_<i>.png"""
+    save_dir = os.path.join(debug_dir, base_name)
+    os.makedirs(save_dir, exist_ok=True)
+    for i, det in enumerate(detections):
+        x1, y1, x2, y2 = det["bbox"]
+        crop = image[y1:y2, x1:x2]
+        if crop.size:
+            cv2.imwrite(os.path.join(save_dir, f"{base_name}-{det['class']}_area_{i+1}.png"), crop)
+
+
+def to_record(path, output=None, detections=None, error=None):
+    record = {"file": os.path.basename(path)}
+    if error:
+        record["error"] = error
+        return record
+    record.update({
+        "detections": detections,
+        "text": output["text"],
+        "entities": [asdict(e) for e in output["entities"]],
+        "ocr_engines_used": output["ocr_engines_used"],
+        "detected_language": output["detected_language"],
+        "language_confidence": output.get("language_confidence"),
+        "skipped_regions": output.get("skipped_regions", []),
+    })
+    return record
+
+
+# ===============================
+# PIPELINE
+# ===============================
+
+def run_stream(image_paths, model=None, language="auto", decode_workers=4,
+               prefetch=8, detect_batch_size=8, batch_wait=0.02,
+               queue_size=8, debug_dir=None):
+    """
+    Yield one result record per image, in completion order.
+
+    image_paths:       any iterable of paths (consumed lazily)
+    detect_batch_size: max images per YOLO call
+    queue_size:        bound for each inter-stage queue
+    debug_dir:         if set, crops are also written there as PNGs
+    """
+    if model is None:
+        model = load_detector()
+
+    decoded_q = queue.Queue(maxsize=queue_size)
+    detected_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    threads = [
+        threading.Thread(
+            target=_decode_stage,
+            args=(image_paths, decoded_q, stop, decode_workers, prefetch),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_detect_stage,
+            args=(model, decoded_q, detected_q, stop, detect_batch_size, batch_wait),
+            daemon=True,
+        ),
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = detected_q.get()
+            if item is _DONE:
+                break
+
+            path, image, detections, error = item
+            if error:
+                yield to_record(path, error=error)
+                continue
+
+            if debug_dir:
+                base_name = os.path.splitext(os.path.basename(path))[0]
+                save_debug_crops(image, detections, debug_dir, base_name)
+
+            try:
+                output = process_image(image, detections, language=language)
+            except Exception as e:
+                yield to_record(path, error=f"OCR failed: {e}")
+                continue
+
+            yield to_record(path, output, detections)
+    finally:
+        # Unblock upstream stages if the consumer stops early
+        stop.set()
+        for t in threads:
+            t.join(timeout=1)
+
+
+# ===============================
+# ENTRY POINT
+# ===============================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream images through detection, OCR and NER")
+    parser.add_argument("--images", default="citizenship/images")
+    parser.add_argument("--output", default="Result/stream_results.jsonl")
+    parser.add_argument("--backend", default=None, choices=["torch", "onnx"],
+                        help="detector backend (default: $DETECTOR_BACKEND or torch)")
+    parser.add_argument("--weights", default=None, help=".pt for torch, .onnx for onnx")
+    parser.add_argument("--language", default="auto", choices=["auto", "en", "ne", "script"])
+    parser.add_argument("--decode-workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--debug-crops", default=None,
+                        help="also write region crops here (e.g. citizenship/cropped_regions)")
+    parser.add_argument("--entity-store", default=None,
+                        help="also index entities into this SQLite file (e.g. Result/entities.sqlite)")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+
+    store = EntityStore(args.entity_store) if args.entity_store else None
+    to_index = []
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for record in run_stream(
+            list_images(args.images),
+            model=load_detector(args.backend, args.weights),
+            language=args.language,
+            decode_workers=args.decode_workers,
+            detect_batch_size=args.batch_size,
+            debug_dir=args.debug_crops,
+        ):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"{record['file']}: {record.get('text', record.get('error', ''))[:60]}...")
+
+            if store is not None and "entities" in record:
+                to_index.append((record["file"], record["entities"]))
+                if len(to_index) >= 64:
+                    store.add_many(to_index)
+                    to_index = []
+
+    print(f"\nStreamed results to {args.output}")
+    if store is not None:
+        store.add_many(to_index)
+        print(f"Indexed entities into {args.entity_store}: {store.stats()}")
+        store.close()